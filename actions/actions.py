@@ -1,36 +1,75 @@
+import time
+_startup_begin = time.perf_counter()
+
 import os
 import json
 import logging
 import pandas as pd
-import faiss
 import numpy as np
 import random
-from typing import List, Dict, Any
+import shutil
+import uuid
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
 
-from config.model_config import MODEL_CONFIG, SEARCH_CONFIG, RESPONSE_TEMPLATES
+from config.model_config import MODEL_CONFIG, SEARCH_CONFIG, CATALOG_CONFIG, INGEST_CONFIG, RESPONSE_TEMPLATES
 from utils.database_manager import DatabaseManager
 from utils.model_manager import ModelManager
+from utils.embedding_service import EmbeddingService
 from utils.text_processor import TextProcessor
 from utils.menu_searcher import MenuSearcher
+from utils.catalog_store import CatalogStore
+from utils.feature_index import FeatureIndex
+from utils.tfidf_index import TfidfIndex
+from utils.text_index import TextIndex
+from utils.catalog_delta import CatalogDelta
+from utils.columnar_store import ColumnarMenus
+from utils.vector_index import VectorIndex
+from utils.ingest_pipeline import IngestPipeline, prepare_menus
+from utils.ingest_jobs import IngestJob, IngestJobManager, describe_status
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cold-start breakdown of the action server, in milliseconds
+STARTUP_TIMINGS = {'imports_ms': round((time.perf_counter() - _startup_begin) * 1000, 2)}
+
 # Global instances
+_managers_begin = time.perf_counter()
 try:
     model_manager = ModelManager()
-    menu_searcher = MenuSearcher()
+    embedding_service = EmbeddingService(model_manager) if MODEL_CONFIG.get('micro_batching', True) else None
+    menu_searcher = MenuSearcher(model_manager, embedding_service)
+    catalog_store = CatalogStore()
+    ingest_jobs = IngestJobManager()
     logger.info("Successfully initialized managers")
 except Exception as e:
     logger.error(f"Error initializing managers: {e}")
     model_manager = None
+    embedding_service = None
     menu_searcher = None
+    catalog_store = None
+    ingest_jobs = None
+STARTUP_TIMINGS['managers_ms'] = round((time.perf_counter() - _managers_begin) * 1000, 2)
+
+if model_manager and MODEL_CONFIG.get('warmup_on_start', True):
+    model_manager.warm_up(background=True)
+STARTUP_TIMINGS['ready_ms'] = round((time.perf_counter() - _startup_begin) * 1000, 2)
+logger.info(f"Action server startup: imports {STARTUP_TIMINGS['imports_ms']} ms, "
+            f"managers {STARTUP_TIMINGS['managers_ms']} ms, ready after {STARTUP_TIMINGS['ready_ms']} ms "
+            f"(model {'loaded' if model_manager and model_manager.is_model_ready() else 'deferred'})")
+
+def get_startup_report() -> Dict:
+    """Startup timings plus the (possibly later) model load timings"""
+    report = dict(STARTUP_TIMINGS)
+    if model_manager:
+        report['model'] = dict(model_manager.load_timings) or {'status': 'not loaded'}
+    return report
 
 class ActionIngestMenus(Action):
     """Enhanced menu ingestion with comprehensive feedback"""
@@ -39,52 +78,127 @@ class ActionIngestMenus(Action):
         return "action_ingest_menus"
 
     def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: dict) -> List[Dict]:
+        if not model_manager or not menu_searcher or not catalog_store or not ingest_jobs:
+            dispatcher.utter_message(text="Error: Model manager tidak tersedia.")
+            return []
+        
+        if not INGEST_CONFIG.get('background', True):
+            job = ingest_jobs.create('action')
+            if not ingest_jobs.run(job, lambda job: self.ingest(dispatcher, job)) and job.state == 'rejected':
+                # A rejected job never reached the chat dispatcher, so relay its message
+                for message in job.messages:
+                    dispatcher.utter_message(text=message)
+            return []
+        
+        # The job reports to itself; the current catalog keeps serving until it publishes the new one
+        status, started = ingest_jobs.start(lambda job: self.ingest(job, job))
+        if started:
+            dispatcher.utter_message(
+                text=f"⏳ Ingest berjalan di background (job {status['job_id']}). Menu lama tetap bisa dicari sampai "
+                     f"katalog baru siap.\nKetik 'status ingest' untuk melihat progres atau 'batalkan ingest' "
+                     f"untuk membatalkan."
+            )
+        else:
+            dispatcher.utter_message(
+                text=f"Ingest job {status['job_id']} masih berjalan. Ketik 'status ingest' untuk melihat progres."
+            )
+        return []
+    
+    def ingest(self, dispatcher, job: IngestJob) -> bool:
+        """Diff, derive, embed and publish the catalog, reporting to dispatcher; True once the catalog is current"""
         dispatcher.utter_message(text="Memulai ingest data menu dengan Enhanced Multi-Value + Fixed Seafood Detection...")
         
         try:
-            if not model_manager or not menu_searcher:
-                dispatcher.utter_message(text="Error: Model manager tidak tersedia.")
-                return []
+            job.set_stage('loading')
+            # Diff against the stored catalog so only new and changed menus are re-derived and re-embedded
+            stored = self._load_stored_catalog() if CATALOG_CONFIG.get('incremental_ingest', True) else None
+            available_menus_df, delta = None, None
+            if stored:
+                available_menus_df = DatabaseManager.load_available_menus()
+                if available_menus_df.empty:
+                    dispatcher.utter_message(text="Tidak ada menu yang tersedia di database.")
+                    return False
+                
+                available_menus_df['content_hash'] = CatalogDelta.content_hashes(available_menus_df)
+                delta = CatalogDelta.compute(stored[0], available_menus_df)
+                if delta.is_empty():
+                    dispatcher.utter_message(
+                        text=f"✅ Katalog sudah up to date ({len(available_menus_df)} menu), tidak ada perubahan."
+                    )
+                    return True
             
-            available_menus_df = DatabaseManager.load_available_menus()
+            job.check_cancelled()
+            job.set_stage('embedding')
+            dispatcher.utter_message(text="Membuat enhanced embeddings untuk multi-value search...")
+            model_manager.last_embed_stats = {}
+            self.last_pipeline_stats = {}
+            
+            updated = self._apply_delta(stored, available_menus_df, delta) if delta is not None else None
+            if updated is None:
+                delta = None
+                # Without a stored catalog the rows are streamed from the database chunk by chunk
+                available_menus_df, index, index_info = self._build_full(available_menus_df, job)
+            else:
+                available_menus_df, index, index_info = updated
             
             if available_menus_df.empty:
                 dispatcher.utter_message(text="Tidak ada menu yang tersedia di database.")
-                return []
-            
-            # Create enhanced search text
-            available_menus_df['search_text'] = available_menus_df.apply(
-                lambda row: TextProcessor.create_search_text(row) or "makanan", axis=1
-            )
-            
-            texts = available_menus_df['search_text'].tolist()
-            dispatcher.utter_message(text="Membuat enhanced embeddings untuk multi-value search...")
-            
-            embeddings = model_manager.embed_texts(texts)
-            
-            if embeddings.size == 0:
+                return False
+            if index is None:
                 dispatcher.utter_message(text="Gagal membuat embeddings!")
-                return []
+                return False
             
-            # Create and save FAISS index
+            job.check_cancelled()
+            job.set_stage('writing')
+            # Write the artifacts into a new version directory and publish it atomically once complete
+            catalog_version = uuid.uuid4().hex
+            version_dir = catalog_store.version_dir(catalog_version)
             try:
-                index = faiss.IndexFlatIP(embeddings.shape[1])
-                index.add(embeddings)
+                import faiss
+                os.makedirs(version_dir)
+                faiss.write_index(index, catalog_store.artifact_path('index', version_dir))
+                if CATALOG_CONFIG.get('menu_format', 'columnar') == 'columnar':
+                    ColumnarMenus.write(available_menus_df, catalog_store.artifact_path('columnar_menus', version_dir))
+                else:
+                    available_menus_df.to_pickle(catalog_store.artifact_path('menus', version_dir))
+                FeatureIndex.build(available_menus_df).save(catalog_store.artifact_path('feature_index', version_dir))
+                TextIndex.build(available_menus_df).save(catalog_store.artifact_path('text_index', version_dir))
+                if SEARCH_CONFIG.get('tfidf_weight', 0.0) > 0:
+                    # Search ignores TF-IDF at weight 0, so only fit it when the signal is enabled
+                    TfidfIndex.fit([
+                        TextProcessor.build_menu_text(menu) for _, menu in available_menus_df.iterrows()
+                    ]).save(catalog_store.artifact_path('tfidf_index', version_dir))
                 
-                os.makedirs(MODEL_CONFIG['models_dir'], exist_ok=True)
-                faiss.write_index(index, f"{MODEL_CONFIG['models_dir']}/menu_index.faiss")
-                available_menus_df.to_pickle(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl")
+                if model_manager.is_model_ready() or not stored:
+                    model_info = model_manager.get_model_info()
+                else:
+                    # Removal-only updates never load the model
+                    model_info = stored[2].get('model_info', {})
                 
                 # Enhanced metadata
                 metadata = {
                     'approach': 'ENHANCED_MULTI_VALUE_SEAFOOD_v5.0',
                     'version': '5.0_enhanced_multi_value',
+                    'catalog_version': catalog_version,
                     'total_menus': len(available_menus_df),
                     'last_updated': datetime.now().isoformat(),
-                    'model_info': model_manager.get_model_info(),
+                    'model_info': model_info,
+                    'embedding_stats': model_manager.last_embed_stats,
+                    'faiss_id_space': 'menu_id',
+                    'index_info': index_info,
+                    'ingest_mode': 'incremental' if delta is not None else 'full',
+                    'last_delta': delta.summary() if delta is not None else None,
                     'multi_value_strict_matching': True,
                     'seafood_detection_enhanced': True,
                     'features': {
+                        'precomputed_menu_features': True,
+                        'feature_inverted_index': True,
+                        'persistent_tfidf_index': SEARCH_CONFIG.get('tfidf_weight', 0.0) > 0,
+                        'field_token_index': True,
+                        'dietary_flag_columns': True,
+                        'columnar_menu_store': CATALOG_CONFIG.get('menu_format', 'columnar') == 'columnar',
+                        'embedding_cache': True,
+                        'incremental_ingest': True,
                         'enhanced_multi_value_scoring': True,
                         'strict_requirement_matching': True,
                         'comprehensive_seafood_patterns': True,
@@ -92,21 +206,45 @@ class ActionIngestMenus(Action):
                     }
                 }
                 
-                with open(f"{MODEL_CONFIG['models_dir']}/metadata.json", 'w', encoding='utf-8') as f:
+                with open(catalog_store.artifact_path('metadata', version_dir), 'w', encoding='utf-8') as f:
                     json.dump(metadata, f, indent=2, ensure_ascii=False)
                 
+                job.check_cancelled()
+                job.set_stage('publishing')
+                catalog_store.publish(catalog_version)
+                catalog_store.reload(force=True)
+                if delta is not None:
+                    self._log_delta(delta, stored[2], metadata)
+                
+            except InterruptedError:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                raise
             except Exception as e:
+                # Nothing was published, so readers keep serving the previous version
+                shutil.rmtree(version_dir, ignore_errors=True)
                 logger.error(f"Error saving index: {e}")
                 dispatcher.utter_message(text=f"Error menyimpan index: {str(e)}")
-                return []
+                return False
             
             # Generate database statistics
             stats = DatabaseManager.get_database_stats(available_menus_df)
+            embed_stats = model_manager.last_embed_stats
+            if delta is not None:
+                mode_text = (f"incremental (+{len(delta.added)} baru, ~{len(delta.updated)} diubah, "
+                             f"-{len(delta.removed)} dihapus)")
+            else:
+                pipeline = self.last_pipeline_stats
+                mode_text = (f"full rebuild ({pipeline.get('chunks', 0)} chunk, {pipeline.get('workers', 0)} worker, "
+                             f"{pipeline.get('rows_per_s', 0)} menu/s)")
             
             dispatcher.utter_message(
                 text=f"✅ Enhanced Multi-Value System berhasil diinisialisasi!\n\n"
                      f"📊 Total Menu: {stats['total_menus']} menu\n"
-                     f"🤖 Model: {model_manager.model_name}\n"
+                     f"🤖 Model: {model_manager.model_name} ({model_manager.embedding_backend or 'torch'})\n"
+                     f"🧠 Embeddings: {embed_stats.get('reused', 0)} dari cache, {embed_stats.get('encoded', 0)} baru\n"
+                     f"🔁 Mode: {mode_text}\n"
+                     f"🗂️ Index: {index_info.get('factory', 'Flat')} {index_info.get('search_params') or ''} "
+                     f"(recall@{index_info.get('recall_k', 10)} {index_info.get('recall_at_k', 1.0)})\n"
                      f"🎯 Max Results: {SEARCH_CONFIG.get('max_results', 8)}\n\n"
                      f"🔍 Fitur Enhanced:\n"
                      f"• Strict multi-value requirement matching\n"
@@ -115,11 +253,185 @@ class ActionIngestMenus(Action):
                      f"• Database statistics ready\n\n"
                      f"Ketik 'show stats' untuk melihat statistik lengkap!"
             )
+            return True
             
+        except InterruptedError:
+            logger.info("Ingest cancelled before publishing, keeping the current catalog")
+            dispatcher.utter_message(text="🛑 Ingest dibatalkan. Katalog sebelumnya tetap digunakan.")
         except Exception as e:
             logger.error(f"Error in enhanced ingest: {e}")
             dispatcher.utter_message(text=f"Terjadi kesalahan: {str(e)}")
         
+        return False
+    
+    @staticmethod
+    def _prepare_menus(menus_df: pd.DataFrame) -> pd.DataFrame:
+        """Derive search text, features and dietary columns for freshly loaded menus"""
+        return prepare_menus(menus_df)
+    
+    @staticmethod
+    def _load_stored_catalog():
+        """Previous menus, FAISS index and metadata, or None when they cannot be updated incrementally"""
+        base_dir = catalog_store.current_dir()
+        try:
+            if not all(os.path.exists(catalog_store.artifact_path(name, base_dir)) for name in ('metadata', 'index')):
+                return None
+            
+            with open(catalog_store.artifact_path('metadata', base_dir), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            if metadata.get('faiss_id_space') != 'menu_id':
+                logger.info("Stored index is not keyed on menu id, running a full ingest")
+                return None
+            
+            if os.path.isdir(catalog_store.artifact_path('columnar_menus', base_dir)):
+                menus = ColumnarMenus.load(catalog_store.artifact_path('columnar_menus', base_dir)).to_frame()
+            elif os.path.exists(catalog_store.artifact_path('menus', base_dir)):
+                menus = pd.read_pickle(catalog_store.artifact_path('menus', base_dir))
+            else:
+                return None
+            if not {'id', 'content_hash', 'search_text'}.issubset(menus.columns):
+                logger.info("Stored catalog has no content hashes, running a full ingest")
+                return None
+            
+            # Read into memory: the index is modified and written to the next version
+            index = VectorIndex.read(catalog_store.artifact_path('index', base_dir), mmap=False)
+            if index.ntotal != len(menus):
+                logger.warning(f"Stored index size {index.ntotal} does not match catalog size {len(menus)}, "
+                               f"running a full ingest")
+                return None
+            return menus, index, metadata
+        except Exception as e:
+            logger.warning(f"Stored catalog cannot be updated incrementally, running a full ingest: {e}")
+            return None
+    
+    def _build_full(self, menus_df: Optional[pd.DataFrame] = None, job: Optional[IngestJob] = None):
+        """Derive every menu and build a new FAISS index keyed on menu id, streaming chunks through the pipeline
+
+        menus_df is the already loaded catalog; without it the rows are read from the database in chunks.
+        Unchanged menus reuse their cached embeddings; menus no longer in the catalog are evicted.
+        """
+        pipeline = IngestPipeline(model_manager, progress_callback=job.update_progress if job else None)
+        if job:
+            job.attach(pipeline)
+        if menus_df is None:
+            chunks = DatabaseManager.iter_available_menus(pipeline.chunk_size)
+            total = DatabaseManager.count_menus()
+        else:
+            chunks, total = IngestPipeline.split(menus_df, pipeline.chunk_size), len(menus_df)
+        try:
+            return pipeline.run(chunks, total)
+        finally:
+            self.last_pipeline_stats = pipeline.progress()
+    
+    def _apply_delta(self, stored, menus_df: pd.DataFrame, delta: CatalogDelta):
+        """Re-derive and re-embed only changed menus and patch the stored index; None forces a full ingest"""
+        stored_menus, index, metadata = stored
+        index_info = metadata.get('index_info', {})
+        if (index_info.get('requested') != VectorIndex.requested() or
+                index_info.get('resolved_type') != VectorIndex.resolve_type(len(menus_df))):
+            logger.info("Index configuration or size class changed since the last ingest, running a full ingest")
+            return None
+        if delta.stale_ids and not VectorIndex.supports_removal(index_info):
+            logger.info(f"{index_info.get('index_type')} indexes cannot drop vectors, running a full ingest")
+            return None
+        
+        changed = self._prepare_menus(menus_df[menus_df['id'].isin(delta.changed_ids)].copy())
+        
+        cache = None
+        if len(changed):
+            if set(changed.columns) != set(stored_menus.columns):
+                logger.info("Catalog columns changed since the last ingest, running a full ingest")
+                return None
+            cache = model_manager.open_embedding_cache()
+            embeddings = model_manager.embed_texts(changed['search_text'].tolist(), use_cache=True, cache=cache)
+            stored_model = metadata.get('model_info', {})
+            if embeddings.size == 0 or (
+                    embeddings.shape[1] != index.d or model_manager.model_name != stored_model.get('model_name') or
+                    model_manager.embedding_backend != stored_model.get('embedding_backend', 'torch')):
+                model_manager.close_embedding_cache(cache)
+                if embeddings.size:
+                    logger.info("Embedding model changed since the last ingest, running a full ingest")
+                return None
+        
+        if not VectorIndex.apply_delta(index, delta.stale_ids, embeddings if len(changed) else None,
+                                       changed['id'].to_numpy(dtype=np.int64)):
+            if cache is not None:
+                model_manager.close_embedding_cache(cache)
+            logger.info("Stored index cannot drop vectors, running a full ingest")
+            return None
+        
+        kept = stored_menus[~stored_menus['id'].isin(delta.stale_ids)]
+        menus = pd.concat([kept, changed[stored_menus.columns]] if len(changed) else [kept], ignore_index=True)
+        menus = menus.sort_values('id', kind='stable').reset_index(drop=True)
+        
+        if cache is not None:
+            # Unchanged menus were not re-embedded, so mark their texts as used before evicting the rest.
+            # Removal-only deltas never load the model; their orphans go with the next delta that does.
+            cache.seen.update(model_manager.embedding_cache_keys(menus['search_text'].tolist()))
+            evicted = model_manager.close_embedding_cache(cache, evict_orphans=True)
+            model_manager.last_embed_stats.update(evicted=evicted, cache_size=len(cache))
+        logger.info(f"Applied catalog delta: {len(changed)} menus embedded, {len(delta.stale_ids)} vectors dropped")
+        return menus, index, index_info
+    
+    @staticmethod
+    def _log_delta(delta: CatalogDelta, previous_metadata: Dict, metadata: Dict) -> None:
+        """Append the applied change set to the delta log, keeping only the newest delta_log_entries"""
+        try:
+            entry = dict(delta.to_dict(), base_version=previous_metadata.get('catalog_version'),
+                         catalog_version=metadata['catalog_version'], applied_at=metadata['last_updated'])
+            path = os.path.join(MODEL_CONFIG['models_dir'], CATALOG_CONFIG.get('delta_log', 'catalog_deltas.jsonl'))
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+            
+            max_entries = CATALOG_CONFIG.get('delta_log_entries', 1000)
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            if max_entries and len(lines) > max_entries:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(lines[-max_entries:])
+                os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write catalog delta log: {e}")
+
+class ActionIngestStatus(Action):
+    """Report the progress of the current or most recent ingest job"""
+    
+    def name(self) -> str:
+        return "action_ingest_status"
+    
+    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: dict) -> List[Dict]:
+        try:
+            if not ingest_jobs:
+                dispatcher.utter_message(text="Error: Model manager tidak tersedia.")
+                return []
+            dispatcher.utter_message(text=describe_status(ingest_jobs.status()))
+        except Exception as e:
+            logger.error(f"Error reading ingest status: {e}")
+            dispatcher.utter_message(text="Gagal membaca status ingest.")
+        return []
+
+class ActionCancelIngest(Action):
+    """Cancel the running ingest job; the published catalog stays in place"""
+    
+    def name(self) -> str:
+        return "action_cancel_ingest"
+    
+    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: dict) -> List[Dict]:
+        try:
+            if not ingest_jobs:
+                dispatcher.utter_message(text="Error: Model manager tidak tersedia.")
+                return []
+            status = ingest_jobs.cancel()
+            if status is None:
+                dispatcher.utter_message(text="Tidak ada ingest yang sedang berjalan.")
+            else:
+                dispatcher.utter_message(
+                    text=f"🛑 Pembatalan ingest job {status['job_id']} diminta. Katalog sebelumnya tetap digunakan."
+                )
+        except Exception as e:
+            logger.error(f"Error cancelling ingest: {e}")
+            dispatcher.utter_message(text="Gagal membatalkan ingest.")
         return []
 
 class ActionRecommendMenu(Action):
@@ -145,21 +457,16 @@ class ActionRecommendMenu(Action):
                 dispatcher.utter_message(text="Search engine tidak tersedia.")
                 return []
             
-            # Load menus
-            try:
-                available_menus_df = pd.read_pickle(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl")
-            except Exception as e:
-                logger.error(f"Error loading menus: {e}")
-                dispatcher.utter_message(text="Error loading menu database.")
-                return []
+            catalog = catalog_store.get_catalog()
+            available_menus_df = catalog.menus
             
             if available_menus_df.empty:
                 dispatcher.utter_message(text="Tidak ada menu yang tersedia di database.")
                 return []
             
             # Enhanced feature extraction
-            query_expanded = TextProcessor.expand_with_synonyms(query)
-            query_features = TextProcessor.extract_features(query_expanded)
+            query_expanded = TextProcessor.expand_query(query)
+            query_features = TextProcessor.extract_query_features(query_expanded)
             
             logger.info(f"Enhanced search query: '{query}' -> Features: {query_features}")
             
@@ -171,7 +478,7 @@ class ActionRecommendMenu(Action):
             logger.info(f"Query analysis: vegetarian={is_vegetarian}, seafood={is_seafood}, multi_value={is_multi_value}")
             
             # Enhanced search
-            menu_recommendations = menu_searcher.search_menus(query, available_menus_df)
+            menu_recommendations = menu_searcher.search_menus(query, available_menus_df, catalog=catalog)
             
             if menu_recommendations:
                 # Generate enhanced response
@@ -247,14 +554,9 @@ class ActionRecommendMenu(Action):
             return tracker.latest_message.get('text', '') if tracker.latest_message else ''
     
     def _check_knowledge_base(self) -> bool:
-        """Check if knowledge base exists"""
+        """Check if knowledge base is loaded in memory"""
         try:
-            required_files = [
-                f"{MODEL_CONFIG['models_dir']}/menu_index.faiss",
-                f"{MODEL_CONFIG['models_dir']}/available_menus.pkl",
-                f"{MODEL_CONFIG['models_dir']}/metadata.json"
-            ]
-            return all(os.path.exists(file) for file in required_files)
+            return catalog_store is not None and catalog_store.is_ready()
         except Exception:
             return False
     
@@ -300,8 +602,7 @@ class ActionRecommendMenu(Action):
             for i, menu in enumerate(recommendations, 1):
                 try:
                     # Calculate match quality
-                    menu_text = f"{menu.get('title', '')} {menu.get('ingredients', '')} {menu.get('description', '')}"
-                    menu_features = TextProcessor.extract_features(menu_text)
+                    menu_features = TextProcessor.get_menu_features(menu)
                     
                     # Calculate satisfaction metrics
                     total_required = sum(len(values) for values in query_features.values()) if query_features else 1
@@ -384,31 +685,19 @@ class ActionShowStats(Action):
     def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: dict) -> List[Dict]:
         try:
             # Check if database is available
-            if not os.path.exists(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl"):
+            if not catalog_store or not catalog_store.is_ready():
                 dispatcher.utter_message(text="Database belum tersedia. Silakan lakukan ingest data terlebih dahulu.")
                 return []
             
-            # Load menu data
-            try:
-                available_menus_df = pd.read_pickle(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl")
-                metadata_path = f"{MODEL_CONFIG['models_dir']}/metadata.json"
-                
-                metadata = {}
-                if os.path.exists(metadata_path):
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                
-            except Exception as e:
-                logger.error(f"Error loading database stats: {e}")
-                dispatcher.utter_message(text="Error mengakses database statistics.")
-                return []
+            catalog = catalog_store.get_catalog()
+            metadata = catalog.metadata
             
-            if available_menus_df.empty:
+            if catalog.menus.empty:
                 dispatcher.utter_message(text="Database kosong. Tidak ada menu yang tersedia.")
                 return []
             
-            # Generate comprehensive statistics
-            stats = DatabaseManager.get_database_stats(available_menus_df)
+            # Generate comprehensive statistics, decoding the menus only for catalogs without a feature index
+            stats = catalog.get_stats() or DatabaseManager.get_database_stats(catalog.materialize(catalog.menus))
             
             # Format statistics response
             stats_text = "DATABASE STATISTICS\n"
@@ -425,6 +714,27 @@ class ActionShowStats(Action):
                 if 'model_info' in metadata:
                     model_info = metadata['model_info']
                     stats_text += f"AI Model: {model_info.get('model_name', 'Unknown')}\n"
+                timings = catalog_store.get_timings()
+                stats_text += f"Catalog Load: {timings['last_load_ms']} ms ({timings['load_count']}x loaded)\n"
+                feature_cache = TextProcessor.get_cache_stats()['features']
+                stats_text += f"Query Cache: {feature_cache['hits']} hits, {feature_cache['misses']} misses ({feature_cache['hit_rate']:.0%})\n"
+                if menu_searcher:
+                    result_cache = menu_searcher.get_cache_stats()
+                    stats_text += f"Result Cache: {result_cache['hits']} hits, {result_cache['misses']} misses ({result_cache['hit_rate']:.0%})\n"
+                if model_manager:
+                    query_embeddings = model_manager.query_cache.stats()
+                    stats_text += (f"Query Embedding Cache: {query_embeddings['hits']} hits, "
+                                   f"{query_embeddings['misses']} misses ({query_embeddings['hit_rate']:.0%}), "
+                                   f"{query_embeddings['size']} entries, {query_embeddings['bytes'] // 1024} KiB\n")
+                if embedding_service:
+                    batching = embedding_service.stats()
+                    stats_text += (f"Query Embeddings: {batching['requests']} in {batching['batches']} batches "
+                                   f"(avg {batching['avg_batch_size']}, max {batching['max_batch_size']}), "
+                                   f"queue depth {batching['queue_depth']} (max {batching['max_queue_depth']})\n")
+                startup = get_startup_report()
+                model_load = startup.get('model', {})
+                stats_text += (f"Cold Start: {startup['ready_ms']} ms, model "
+                               f"{str(model_load['total_ms']) + ' ms' if 'total_ms' in model_load else 'not loaded'}\n")
                 stats_text += "\n"
             
             # Category breakdown
@@ -485,16 +795,12 @@ class ActionGetRandomMenu(Action):
 
     def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: dict) -> List[Dict]:
         try:
-            if not os.path.exists(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl"):
+            if not catalog_store or not catalog_store.is_ready():
                 dispatcher.utter_message(text="Database belum tersedia.")
                 return []
             
-            try:
-                available_menus_df = pd.read_pickle(f"{MODEL_CONFIG['models_dir']}/available_menus.pkl")
-            except Exception as e:
-                logger.error(f"Error loading menus for random selection: {e}")
-                dispatcher.utter_message(text="Error loading menu database.")
-                return []
+            catalog = catalog_store.get_catalog()
+            available_menus_df = catalog.menus
             
             if available_menus_df.empty:
                 dispatcher.utter_message(text="Belum ada menu yang tersedia.")
@@ -502,7 +808,7 @@ class ActionGetRandomMenu(Action):
             
             # Enhanced variety selection
             sample_size = min(SEARCH_CONFIG.get('max_results', 8), len(available_menus_df))
-            random_selection = available_menus_df.sample(n=sample_size)
+            random_selection = catalog.materialize(available_menus_df.sample(n=sample_size))
 
             dispatcher.utter_message(text="Berikut pilihan menu acak dari berbagai kategori!")
             
@@ -510,9 +816,8 @@ class ActionGetRandomMenu(Action):
             menu_data = []
             for i, (_, menu) in enumerate(random_selection.iterrows(), 1):
                 try:
-                    menu_text = f"{menu.get('title', '')} {menu.get('ingredients', '')} {menu.get('description', '')}".lower()
-                    is_vegetarian = any(indicator in menu_text for indicator in ['tahu', 'tempe', 'sayur', 'vegetarian'])
-                    is_seafood = any(indicator in menu_text for indicator in ['ikan', 'udang', 'cumi', 'seafood'])
+                    is_vegetarian = bool(menu.get('is_vegetarian', False))
+                    is_seafood = bool(menu.get('is_seafood', False))
                     
                     if is_vegetarian:
                         quality_label = f"Random Vegetarian #{i}"
@@ -0,0 +1,78 @@
+"""Command-line menu ingest, for cron jobs and deploy steps instead of the chat action
+
+Publishes the catalog the same way action_ingest_menus does; a running action server picks the
+new version up on its next catalog check. Run from the repository root:
+
+    python -m actions.ingest_cli            # ingest (incremental when possible)
+    python -m actions.ingest_cli --full     # force a full rebuild
+    python -m actions.ingest_cli --status   # latest job of any process
+    python -m actions.ingest_cli --cancel   # cancel the running job of any process
+
+Ctrl-C cancels the ingest started by this command. Exits non-zero unless the job succeeded.
+"""
+import sys
+import argparse
+import threading
+
+from utils.ingest_jobs import IngestJobManager, describe_status
+
+class _PrintDispatcher:
+    """Dispatcher that writes the ingest messages to stdout"""
+
+    def utter_message(self, text=None, **kwargs):
+        if text:
+            print(text, flush=True)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ingest the menu catalog from MySQL")
+    parser.add_argument('--full', action='store_true', help="rebuild everything instead of applying a delta")
+    parser.add_argument('--status', action='store_true', help="show the latest ingest job and exit")
+    parser.add_argument('--cancel', action='store_true', help="cancel the running ingest job and exit")
+    parser.add_argument('--interval', type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    if args.status or args.cancel:
+        jobs = IngestJobManager()
+        if args.status:
+            print(describe_status(jobs.status()))
+            return 0
+        status = jobs.cancel()
+        print(f"Cancellation of job {status['job_id']} requested" if status else "No ingest job is running")
+        return 0 if status else 1
+
+    # Imported here: loading the action module initializes the model and catalog managers
+    from config.model_config import CATALOG_CONFIG
+    from actions import actions as server
+    if not server.ingest_jobs:
+        print("Managers failed to initialize, see the log above", file=sys.stderr)
+        return 1
+    if args.full:
+        CATALOG_CONFIG['incremental_ingest'] = False
+
+    action = server.ActionIngestMenus()
+    dispatcher = _PrintDispatcher()
+    job = server.ingest_jobs.create('cli')
+    print(f"Ingest job {job.job_id}", flush=True)
+    worker = threading.Thread(target=server.ingest_jobs.run, args=(job, lambda job: action.ingest(dispatcher, job)),
+                              name=f"ingest-{job.job_id}")
+    worker.start()
+
+    last_line = None
+    try:
+        while worker.is_alive():
+            worker.join(args.interval)
+            line = describe_status(job.to_dict()).splitlines()
+            line = " | ".join(line[:2])
+            if worker.is_alive() and line != last_line:
+                print(line, flush=True)
+                last_line = line
+    except KeyboardInterrupt:
+        print("Cancelling, the current catalog stays published...", flush=True)
+        job.cancel()
+        worker.join()
+
+    print(describe_status(job.to_dict()))
+    return 0 if job.state == 'succeeded' else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Micro-benchmark: per-text cost of the protein/flavor/region detectors and search filters
+
+Compares the original inline re.search loops with the precompiled PATTERNS registry and
+counts the texts on which they report different flags. Run from the repository root:
+
+    python benchmarks/bench_detectors.py [num_texts]
+"""
+import os
+import re
+import sys
+import glob
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from utils.text_processor import TextProcessor
+from utils import pattern_registry as registry
+from utils.pattern_registry import PATTERNS
+
+logging.disable(logging.CRITICAL)
+
+# Flag -> phrases tables behind each registry detector
+DETECTOR_TERMS = {
+    'protein': {'seafood': registry.SEAFOOD_TERMS, 'land_animal': registry.LAND_ANIMAL_TERMS,
+                'vegetarian': registry.VEGETARIAN_TERMS,
+                **registry.SEAFOOD_PROTEIN_TERMS, **registry.LAND_PROTEIN_TERMS},
+    'flavor': registry.FLAVOR_TERMS,
+    'region': registry.REGION_TERMS,
+    'seafood_filter': {'seafood': registry.SEAFOOD_FILTER_TERMS, 'excluded': registry.SEAFOOD_EXCLUSION_TERMS},
+    'vegetarian_filter': {'vegetarian': registry.VEGETARIAN_FILTER_TERMS,
+                          'excluded': registry.VEGETARIAN_EXCLUSION_TERMS}
+}
+
+# Original patterns without a leading word boundary on some alternatives; the registry matches whole
+# words only, so words like "berdaging" or "pngegg" no longer report sapi or telur
+LEGACY_PATTERNS = {
+    ('protein', 'sapi'): r'\bsapi\b|beef\b|daging\b',
+    ('protein', 'telur'): r'\btelur\b|egg\b'
+}
+
+def legacy_flags(detector, terms, text):
+    """Flags as the original detectors computed them: one re.search per pattern"""
+    flags = set()
+    for name, phrases in terms.items():
+        legacy = LEGACY_PATTERNS.get((detector, name))
+        if legacy is not None:
+            found = re.search(legacy, text, re.IGNORECASE)
+        else:
+            found = any(re.search(r'\b' + r'\s+'.join(phrase.split()) + r'\b', text, re.IGNORECASE)
+                        for phrase in phrases)
+        if found:
+            flags.add(name)
+    return flags
+
+def load_texts(limit):
+    frames = []
+    for path in sorted(glob.glob('data/dataset-*.csv')):
+        if 'nutrition' in path:
+            continue
+        data = pd.read_csv(path)
+        frames.append(pd.DataFrame({
+            'title': data['Title'].fillna(''),
+            'ingredients': data['Ingredients'].fillna('').str.replace('--', ', '),
+            'description': data['Steps'].fillna('').str.replace('--', ' ').str[:300]
+        }))
+    menus = pd.concat(frames).head(limit)
+    return [TextProcessor.build_menu_text(menu) for _, menu in menus.iterrows()]
+
+def time_per_text(func, texts):
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    texts = load_texts(limit)
+    print(f"{len(texts)} menu texts, average {sum(map(len, texts)) / len(texts):.0f} chars")
+    print(f"{'detector':<20}{'legacy us':>12}{'registry us':>14}{'speedup':>10}{'mismatches':>12}")
+
+    for detector, pattern in PATTERNS.items():
+        terms = DETECTOR_TERMS[detector]
+        mismatches = sum(legacy_flags(detector, terms, text) != pattern.flags(text) for text in texts)
+        legacy = time_per_text(lambda text: legacy_flags(detector, terms, text), texts)
+        compiled = time_per_text(pattern.flags, texts)
+        print(f"{detector:<20}{legacy:>12.1f}{compiled:>14.1f}{legacy / compiled:>9.1f}x{mismatches:>12}")
+
+if __name__ == '__main__':
+    main()
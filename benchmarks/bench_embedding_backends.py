@@ -0,0 +1,100 @@
+"""Benchmark: CPU embedding backends against the full-precision torch reference
+
+For each backend reports model load time, single-query latency (p50/p95), ingest throughput
+and the drift of its embeddings from the reference, plus how often the top-10 neighbours of a
+query among the menu texts agree. Run from the repository root:
+
+    python benchmarks/bench_embedding_backends.py [num_texts] [backend ...]
+"""
+import os
+import sys
+import glob
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from config.model_config import MODEL_CONFIG
+from utils.embedding_backends import BACKENDS
+from utils.model_manager import ModelManager
+from utils.text_processor import TextProcessor
+
+logging.disable(logging.WARNING)
+
+QUERIES = [
+    "nasi goreng pedas", "ayam bakar madu", "makanan vegetarian tanpa daging", "seafood udang saus padang",
+    "sup hangat untuk anak", "menu sehat rendah kalori", "masakan khas sunda", "ikan goreng sambal",
+    "mie kuah pedas", "tahu tempe manis"
+]
+
+def load_texts(limit):
+    frames = []
+    for path in sorted(glob.glob('data/dataset-*.csv')):
+        if 'nutrition' in path:
+            continue
+        data = pd.read_csv(path)
+        frames.append(pd.DataFrame({
+            'title': data['Title'].fillna(''),
+            'ingredients': data['Ingredients'].fillna('').str.replace('--', ', '),
+            'description': data['Steps'].fillna('').str.replace('--', ' ').str[:300]
+        }))
+    menus = pd.concat(frames).head(limit)
+    return [TextProcessor.build_menu_text(menu) for _, menu in menus.iterrows()]
+
+def run_backend(backend, texts):
+    MODEL_CONFIG['embedding_backend'] = backend
+    manager = ModelManager(lazy=True)
+    start = time.perf_counter()
+    manager.ensure_loaded()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    manager.embed_texts(QUERIES[:2])
+    latencies = []
+    for _ in range(5):
+        for query in QUERIES:
+            start = time.perf_counter()
+            manager.embed_texts([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    corpus = manager.embed_texts(texts)
+    throughput = len(texts) / (time.perf_counter() - start)
+    return {
+        'backend': manager.embedding_backend,
+        'load_ms': load_ms,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'texts_per_s': throughput,
+        'queries': manager.embed_texts(QUERIES),
+        'corpus': corpus
+    }
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    backends = sys.argv[2:] or list(BACKENDS)
+    texts = load_texts(limit)
+    print(f"{len(texts)} menu texts, model {MODEL_CONFIG['primary_model']}")
+    print(f"{'backend':<12}{'load ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}{'speedup':>9}"
+          f"{'min cos':>10}{'top10':>8}")
+
+    reference = None
+    for backend in ['torch'] + [name for name in backends if name != 'torch']:
+        result = run_backend(backend, texts)
+        if result['backend'] != backend:
+            print(f"{backend:<12} unavailable, fell back to {result['backend']}")
+            continue
+        if reference is None:
+            reference = result
+        min_cosine = float((reference['corpus'] * result['corpus']).sum(axis=1).min())
+        k = min(10, len(texts))
+        expected = np.argsort(-reference['queries'] @ reference['corpus'].T, axis=1)[:, :k]
+        found = np.argsort(-result['queries'] @ result['corpus'].T, axis=1)[:, :k]
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(expected, found)])
+        print(f"{backend:<12}{result['load_ms']:>10.0f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['texts_per_s']:>10.0f}{result['texts_per_s'] / reference['texts_per_s']:>8.1f}x"
+              f"{min_cosine:>10.4f}{overlap:>8.2f}")
+
+if __name__ == '__main__':
+    main()
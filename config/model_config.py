@@ -5,7 +5,24 @@ MODEL_CONFIG = {
     'backup_model': 'all-MiniLM-L12-v2',
     'models_dir': 'models',
     'cache_size': 1000,
-    'batch_size': 32
+    'batch_size': 32,
+    'lazy_load': True,
+    'warmup_on_start': True,
+    'offline': False,
+    'snapshot_dir': 'embedding_models',
+    'save_snapshot': True,
+    'embedding_cache': True,
+    'embedding_cache_dir': 'embedding_cache',
+    'embedding_backend': 'torch',
+    'backend_dir': 'embedding_backends',
+    'max_backend_drift': 0.02,
+    'inference_threads': None,
+    'micro_batching': True,
+    'batch_wait_ms': 5,
+    'embed_queue_size': 256,
+    'embed_timeout': 10,
+    'query_embedding_cache_size': 10000,
+    'query_embedding_cache_bytes': 8 * 1024 * 1024
 }
 
 SEARCH_CONFIG = {
@@ -14,7 +31,66 @@ SEARCH_CONFIG = {
     'min_score_threshold': 30,
     'fuzzy_match_threshold': 0.85,
     'semantic_weight': 0.4,
-    'keyword_weight': 0.6
+    'keyword_weight': 0.6,
+    'search_mode': 'hybrid',
+    'semantic_top_k': 50,
+    'semantic_score_scale': 100,
+    'scoring_engine': 'vectorized',
+    'result_cache_size': 512,
+    'result_cache_ttl': 600,
+    # TF-IDF is neither fitted at ingest nor loaded while its weight is 0
+    'tfidf_weight': 0.0,
+    'tfidf_score_scale': 100
+}
+
+TFIDF_CONFIG = {
+    'max_features': 50000,
+    'ngram_range': (1, 2),
+    'min_df': 1
+}
+
+CATALOG_CONFIG = {
+    'reload_check_interval': 5,
+    'drop_columns': ['search_text'],
+    'incremental_ingest': True,
+    'delta_log': 'catalog_deltas.jsonl',
+    'delta_log_entries': 1000,
+    'keep_versions': 3,
+    'menu_format': 'columnar'
+}
+
+INDEX_CONFIG = {
+    'mmap': True,
+    'index_type': 'auto',
+    'vector_encoding': 'flat',
+    'ivf_min_size': 20000,
+    'pq_min_size': 500000,
+    'nlist': None,
+    'nprobe': 8,
+    'max_nprobe': 256,
+    'hnsw_m': 32,
+    'ef_search': 64,
+    'max_ef_search': 1024,
+    'pq_m': None,
+    'pq_bits': 8,
+    'k_factor': 4,
+    'max_k_factor': 64,
+    'max_train_points': 200000,
+    'recall_k': 10,
+    'recall_queries': 200,
+    'min_recall': 0.95
+}
+
+INGEST_CONFIG = {
+    'chunk_size': 2000,
+    'workers': None,
+    'queue_size': 4,
+    'min_parallel_rows': 5000,
+    'start_method': 'spawn',
+    'background': True,
+    'jobs_dir': 'ingest_jobs',
+    'keep_jobs': 20,
+    'status_interval': 1.0
 }
 
 SCORING_CONFIG = {
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from utils.vector_index import VectorIndex
+
+DIM = 16
+
+def _catalog(num_vectors, seed=0):
+    embeddings = np.random.default_rng(seed).standard_normal((num_vectors, DIM)).astype(np.float32)
+    faiss.normalize_L2(embeddings)
+    return embeddings, np.arange(1, num_vectors + 1, dtype=np.int64)
+
+def _index(index_type, num_vectors):
+    embeddings, ids = _catalog(num_vectors)
+    spec = VectorIndex.factory_spec(index_type, 'flat', num_vectors, DIM)
+    return VectorIndex.build(embeddings, ids, spec), embeddings, ids
+
+def _delta(embeddings, ids):
+    """One updated menu (id 3) and one removed menu (id 5)"""
+    updated = np.random.default_rng(1).standard_normal((1, DIM)).astype(np.float32)
+    faiss.normalize_L2(updated)
+    return [3, 5], updated, np.array([3], dtype=np.int64)
+
+@pytest.mark.parametrize("index_type", ['flat', 'ivf_flat'])
+def test_apply_delta_updates_and_removes_in_place(index_type):
+    index, embeddings, ids = _index(index_type, 4000)
+    stale_ids, updated, updated_ids = _delta(embeddings, ids)
+
+    assert VectorIndex.supports_removal({'index_type': index_type})
+    assert VectorIndex.apply_delta(index, stale_ids, updated, updated_ids)
+    assert index.ntotal == len(ids) - 1
+
+    VectorIndex.apply_search_params(index, {'nprobe': 1000})
+    _, found = index.search(updated, 1)
+    assert found[0][0] == 3
+    _, found = index.search(embeddings[4:5], 1)
+    assert found[0][0] != 5
+
+@pytest.mark.parametrize("index_type", ['ivf_pq', 'hnsw'])
+def test_apply_delta_refuses_indexes_that_cannot_remove_ids(index_type):
+    index, embeddings, ids = _index(index_type, 10000)
+    stale_ids, updated, updated_ids = _delta(embeddings, ids)
+
+    assert not VectorIndex.supports_removal({'index_type': index_type})
+    assert not VectorIndex.apply_delta(index, stale_ids, updated, updated_ids)
+    # Nothing was added, so the caller can fall back to a full rebuild
+    assert index.ntotal == len(ids)
+
+def test_apply_delta_adds_to_any_index_without_stale_ids():
+    index, embeddings, ids = _index('ivf_pq', 10000)
+    added, _ = _catalog(2, seed=2)
+
+    assert VectorIndex.apply_delta(index, [], added, np.array([20001, 20002], dtype=np.int64))
+    assert index.ntotal == len(ids) + 2
@@ -0,0 +1,68 @@
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Database columns whose change requires re-deriving a menu's text, features and embedding
+CONTENT_COLUMNS = ('title', 'price', 'image', 'ingredients', 'description')
+
+class CatalogDelta:
+    """Menu ids added, updated and removed between the stored catalog and the database"""
+
+    def __init__(self, added: List[int], updated: List[int], removed: List[int], unchanged: int):
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+        self.unchanged = unchanged
+
+    @staticmethod
+    def content_hashes(menus_df: pd.DataFrame) -> pd.Series:
+        """Fingerprint of each menu's database content"""
+        columns = [col for col in CONTENT_COLUMNS if col in menus_df.columns]
+        return menus_df[columns].astype(str).apply(
+            lambda row: hashlib.sha1('\x1f'.join(row).encode('utf-8')).hexdigest(), axis=1
+        )
+
+    @classmethod
+    def compute(cls, stored_df: pd.DataFrame, fresh_df: pd.DataFrame) -> 'CatalogDelta':
+        """Compare content hashes keyed on menu id; both frames need 'id' and 'content_hash'"""
+        stored = dict(zip(stored_df['id'].astype(np.int64), stored_df['content_hash']))
+        fresh = dict(zip(fresh_df['id'].astype(np.int64), fresh_df['content_hash']))
+
+        added = sorted(int(menu_id) for menu_id in fresh.keys() - stored.keys())
+        removed = sorted(int(menu_id) for menu_id in stored.keys() - fresh.keys())
+        updated = sorted(int(menu_id) for menu_id in fresh.keys() & stored.keys() if fresh[menu_id] != stored[menu_id])
+        unchanged = len(fresh) - len(added) - len(updated)
+
+        logger.info(f"Catalog delta: {len(added)} added, {len(updated)} updated, {len(removed)} removed, "
+                    f"{unchanged} unchanged")
+        return cls(added, updated, removed, unchanged)
+
+    @property
+    def changed_ids(self) -> List[int]:
+        """Ids whose rows and vectors must be (re)built"""
+        return sorted(self.added + self.updated)
+
+    @property
+    def stale_ids(self) -> List[int]:
+        """Ids whose current vectors must be dropped"""
+        return sorted(self.updated + self.removed)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.updated or self.removed)
+
+    def summary(self) -> Dict[str, int]:
+        """Change counts"""
+        return {
+            'added': len(self.added),
+            'updated': len(self.updated),
+            'removed': len(self.removed),
+            'unchanged': self.unchanged
+        }
+
+    def to_dict(self) -> Dict:
+        """Counts plus the affected ids, for the persisted delta log"""
+        return dict(self.summary(), added_ids=self.added, updated_ids=self.updated, removed_ids=self.removed)
@@ -0,0 +1,404 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Optional, Tuple
+from config.model_config import MODEL_CONFIG, CATALOG_CONFIG, SEARCH_CONFIG
+from utils.text_processor import TextProcessor, DIETARY_COLUMNS
+from utils.feature_index import FeatureIndex
+from utils.tfidf_index import TfidfIndex
+from utils.text_index import TextIndex
+from utils.columnar_store import ColumnarMenus
+from utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILES = {
+    'index': 'menu_index.faiss',
+    'menus': 'available_menus.pkl',
+    'columnar_menus': 'menus',
+    'metadata': 'metadata.json',
+    'feature_index': 'feature_index.pkl',
+    'tfidf_index': 'tfidf_index.npz',
+    'text_index': 'text_index.pkl'
+}
+
+# Each ingest writes a complete catalog into versions/<catalog_version>/ and then atomically
+# rewrites CURRENT with that version name; readers resolve artifacts through CURRENT
+CURRENT_POINTER = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+# Artifacts that older ingests did not write; they are rebuilt in memory when missing
+OPTIONAL_ARTIFACTS = {'feature_index', 'tfidf_index', 'text_index'}
+
+# A catalog stores its menus in one of these formats, columnar preferred
+MENU_ARTIFACTS = ('columnar_menus', 'menus')
+
+class MenuCatalog:
+    """In-memory snapshot of the ingested menu artifacts"""
+
+    def __init__(self, menus: pd.DataFrame, metadata: Dict, faiss_index=None, signature: Tuple = (),
+                 feature_index: Optional[FeatureIndex] = None, tfidf_index: Optional[TfidfIndex] = None,
+                 text_index: Optional[TextIndex] = None, store: Optional[ColumnarMenus] = None):
+        self.menus = menus
+        self.store = store
+        self.metadata = metadata
+        self.faiss_index = faiss_index
+        self.feature_index = feature_index
+        self.tfidf_index = tfidf_index
+        self.text_index = text_index
+        self.signature = signature
+        self.loaded_at = time.time()
+        self._label_ids = None
+        self._label_order = None
+        if metadata.get('faiss_id_space') == 'menu_id' and 'id' in menus.columns:
+            ids = menus['id'].to_numpy(dtype=np.int64)
+            self._label_order = np.argsort(ids, kind='stable')
+            self._label_ids = ids[self._label_order]
+
+    @property
+    def version(self) -> str:
+        """Version label written by the last ingest"""
+        return str(self.metadata.get('catalog_version') or self.metadata.get('last_updated')
+                   or self.metadata.get('version', 'unknown'))
+
+    def materialize(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Rows of the catalog (indexed by position) with their text and feature columns decoded"""
+        if self.store is None:
+            return frame
+        return self.store.materialize(frame)
+
+    def label_positions(self, labels: np.ndarray) -> np.ndarray:
+        """Catalog row positions of FAISS result labels, -1 where a label is unknown"""
+        if self._label_ids is None:
+            # Indexes from older ingests are labelled by row position
+            return labels
+        if len(self._label_ids) == 0:
+            return np.full(len(labels), -1, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self._label_ids, labels), len(self._label_ids) - 1)
+        found = (labels >= 0) & (self._label_ids[slots] == labels)
+        return np.where(found, self._label_order[slots], -1)
+
+    def get_stats(self) -> Optional[Dict]:
+        """DatabaseManager.get_database_stats from the array columns and feature postings; None without them"""
+        menus = self.menus
+        if self.feature_index is None or self.feature_index.num_menus != len(menus):
+            return None
+
+        postings = self.feature_index.postings
+        available = (int(np.count_nonzero(menus['is_available'].to_numpy(dtype=bool)))
+                     if 'is_available' in menus.columns else len(menus))
+        stats = {
+            "total_menus": len(menus),
+            "categories": {
+                "by_protein": {value: len(positions) for value, positions in postings.get('protein', {}).items()},
+                "by_dish_type": {value: len(positions) for value, positions in postings.get('dish_type', {}).items()}
+            },
+            "price_stats": {},
+            "availability": {"available": available, "unavailable": len(menus) - available}
+        }
+
+        if 'numeric_price' in menus.columns:
+            prices = menus['numeric_price'].to_numpy()
+            prices = prices[prices > 0]
+            if prices.size:
+                stats["price_stats"] = {
+                    "min": int(prices.min()),
+                    "max": int(prices.max()),
+                    "avg": int(prices.mean()),
+                    "median": int(np.median(prices))
+                }
+        return stats
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+class CatalogStore:
+    """Process-wide menu catalog that is loaded once and reloaded only when the artifacts change"""
+
+    def __init__(self, models_dir: Optional[str] = None):
+        self.models_dir = models_dir or MODEL_CONFIG['models_dir']
+        self._catalog = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self._timings = {
+            'load_count': 0,
+            'last_load_ms': 0.0,
+            'total_load_ms': 0.0,
+            'last_menus_ms': 0.0,
+            'last_index_ms': 0.0,
+            'last_feature_index_ms': 0.0,
+            'last_tfidf_index_ms': 0.0,
+            'last_text_index_ms': 0.0,
+            'last_metadata_ms': 0.0,
+            'last_loaded_at': None,
+            'last_version': None
+        }
+
+    def artifact_path(self, name: str, base_dir: Optional[str] = None) -> str:
+        """Path of a catalog artifact in base_dir, by default the published version"""
+        return os.path.join(base_dir or self.current_dir(), CATALOG_FILES[name])
+
+    def version_dir(self, version: str) -> str:
+        """Directory holding the artifacts of one catalog version"""
+        return os.path.join(self.models_dir, VERSIONS_DIR, version)
+
+    def current_dir(self) -> str:
+        """Directory of the published version, or models_dir for catalogs ingested before versioning"""
+        try:
+            with open(os.path.join(self.models_dir, CURRENT_POINTER), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+            if version:
+                return self.version_dir(version)
+        except OSError:
+            pass
+        return self.models_dir
+
+    def publish(self, version: str) -> None:
+        """Make a fully written version directory current with one atomic rename, then prune old versions"""
+        version_dir = self.version_dir(version)
+        for directory, _, files in os.walk(version_dir):
+            for name in files:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    os.fsync(f.fileno())
+
+        pointer = os.path.join(self.models_dir, CURRENT_POINTER)
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+        logger.info(f"Published menu catalog version {version}")
+        try:
+            self.prune_versions()
+        except Exception as e:
+            logger.warning(f"Error pruning old menu catalog versions: {e}")
+
+    def prune_versions(self, keep: Optional[int] = None) -> int:
+        """Delete all but the newest `keep` version directories, never the current one"""
+        keep = CATALOG_CONFIG.get('keep_versions', 3) if keep is None else keep
+        root = os.path.join(self.models_dir, VERSIONS_DIR)
+        if not os.path.isdir(root):
+            return 0
+
+        current = os.path.abspath(self.current_dir())
+        versions = sorted((entry for entry in os.scandir(root) if entry.is_dir()),
+                          key=lambda entry: entry.stat().st_mtime, reverse=True)
+        removed = 0
+        # Recent versions stay on disk for workers that are still loading them
+        for entry in versions[max(keep, 1):]:
+            if os.path.abspath(entry.path) == current:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} old menu catalog versions")
+        return removed
+
+    def is_ready(self) -> bool:
+        """Check if the knowledge base exists and is loadable"""
+        return self.get_catalog() is not None
+
+    def get_catalog(self) -> Optional[MenuCatalog]:
+        """Return the current catalog, reloading only when the artifacts changed"""
+        now = time.time()
+        if self._catalog is not None and now - self._last_check < CATALOG_CONFIG.get('reload_check_interval', 5):
+            return self._catalog
+
+        with self._lock:
+            self._last_check = now
+            try:
+                signature = self._read_signature()
+                if signature is None:
+                    return self._catalog
+                if signature != self._signature:
+                    self._load(signature)
+            except Exception as e:
+                logger.error(f"Error checking menu catalog: {e}")
+
+            return self._catalog
+
+    def get_menus(self) -> pd.DataFrame:
+        """Current menu DataFrame, empty if the catalog is not available
+
+        Columnar catalogs hold only their array columns here; MenuCatalog.materialize decodes the rest.
+        """
+        catalog = self.get_catalog()
+        return catalog.menus if catalog is not None else pd.DataFrame()
+
+    def get_metadata(self) -> Dict:
+        """Current catalog metadata"""
+        catalog = self.get_catalog()
+        return catalog.metadata if catalog is not None else {}
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload the artifacts, optionally even when nothing changed on disk"""
+        with self._lock:
+            try:
+                signature = self._read_signature()
+                if signature is None:
+                    logger.warning("Menu catalog artifacts are missing, nothing to reload")
+                    return False
+                if force or signature != self._signature:
+                    self._load(signature, force=force)
+                self._last_check = time.time()
+                return True
+            except Exception as e:
+                logger.error(f"Error reloading menu catalog: {e}")
+                return False
+
+    def get_timings(self) -> Dict:
+        """Load/reload timing information"""
+        return dict(self._timings)
+
+    def _read_signature(self) -> Optional[Tuple]:
+        """Published directory plus file modification times that identify the artifacts on disk"""
+        base_dir = self.current_dir()
+        signature = [('dir', base_dir, None)]
+        for name in CATALOG_FILES:
+            try:
+                stat = os.stat(self.artifact_path(name, base_dir))
+            except OSError:
+                if name in OPTIONAL_ARTIFACTS or name in MENU_ARTIFACTS:
+                    signature.append((name, None, None))
+                    continue
+                return None
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+        if all(entry[1] is None for entry in signature if entry[0] in MENU_ARTIFACTS):
+            return None
+        return tuple(signature)
+
+    def _load(self, signature: Tuple, force: bool = False) -> None:
+        """Load all artifacts into a new catalog snapshot"""
+        start = time.perf_counter()
+        # Read from the directory the signature was taken from, even if CURRENT moved since
+        base_dir = signature[0][1]
+
+        metadata = {}
+        with open(self.artifact_path('metadata', base_dir), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata_done = time.perf_counter()
+
+        data_signature = [entry for entry in signature if entry[0] != 'metadata']
+        if not force and self._catalog is not None and self._catalog.metadata == metadata and \
+                [entry for entry in self._catalog.signature if entry[0] != 'metadata'] == data_signature:
+            # Only metadata was touched, keep serving the loaded frames
+            self._signature = signature
+            self._catalog.signature = signature
+            return
+
+        drop_columns = CATALOG_CONFIG.get('drop_columns', [])
+        store = None
+        if os.path.isdir(self.artifact_path('columnar_menus', base_dir)):
+            store = ColumnarMenus.load(self.artifact_path('columnar_menus', base_dir), exclude=drop_columns)
+            if {'features', *DIETARY_COLUMNS}.issubset(store.columns):
+                # Only the memory-mapped array columns are held; text is decoded per result
+                menus = store.frame()
+            else:
+                menus, store = store.to_frame(), None
+        else:
+            menus = pd.read_pickle(self.artifact_path('menus', base_dir))
+            drop_columns = [col for col in drop_columns if col in menus.columns]
+            if drop_columns:
+                menus = menus.drop(columns=drop_columns)
+            menus = menus.reset_index(drop=True)
+        
+        if store is None:
+            if 'features' not in menus.columns:
+                logger.warning("Catalog has no precomputed features, extracting them once; re-run ingest to persist them")
+                menus['features'] = menus.apply(
+                    lambda row: TextProcessor.extract_features(TextProcessor.build_menu_text(row)), axis=1
+                )
+            if not set(DIETARY_COLUMNS).issubset(menus.columns):
+                logger.warning("Catalog has no dietary flag columns, computing them once; re-run ingest to persist them")
+                menus = TextProcessor.add_dietary_columns(menus)
+        menus_done = time.perf_counter()
+
+        faiss_index = VectorIndex.read(self.artifact_path('index', base_dir),
+                                       search_params=metadata.get('index_info', {}).get('search_params'))
+        index_done = time.perf_counter()
+
+        # Index rebuilds need the decoded text and features
+        full_menus = (lambda: store.to_frame()) if store is not None else (lambda: menus)
+        
+        feature_index = self._load_feature_index(menus, base_dir, full_menus)
+        feature_index_done = time.perf_counter()
+
+        tfidf_index = self._load_tfidf_index(menus, base_dir, full_menus)
+        tfidf_index_done = time.perf_counter()
+
+        text_index = self._load_text_index(menus, base_dir, full_menus)
+        text_index_done = time.perf_counter()
+
+        catalog = MenuCatalog(menus, metadata, faiss_index, signature, feature_index=feature_index,
+                              tfidf_index=tfidf_index, text_index=text_index, store=store)
+        self._catalog = catalog
+        self._signature = signature
+
+        total_ms = (text_index_done - start) * 1000
+        self._timings['load_count'] += 1
+        self._timings['last_load_ms'] = round(total_ms, 2)
+        self._timings['total_load_ms'] = round(self._timings['total_load_ms'] + total_ms, 2)
+        self._timings['last_metadata_ms'] = round((metadata_done - start) * 1000, 2)
+        self._timings['last_menus_ms'] = round((menus_done - metadata_done) * 1000, 2)
+        self._timings['last_index_ms'] = round((index_done - menus_done) * 1000, 2)
+        self._timings['last_feature_index_ms'] = round((feature_index_done - index_done) * 1000, 2)
+        self._timings['last_tfidf_index_ms'] = round((tfidf_index_done - feature_index_done) * 1000, 2)
+        self._timings['last_text_index_ms'] = round((text_index_done - tfidf_index_done) * 1000, 2)
+        self._timings['last_loaded_at'] = catalog.loaded_at
+        self._timings['last_version'] = catalog.version
+
+        logger.info(f"Loaded menu catalog {catalog.version}: {len(menus)} menus in {total_ms:.1f} ms")
+
+    def _load_feature_index(self, menus: pd.DataFrame, base_dir: str,
+                            full_menus: Callable[[], pd.DataFrame]) -> Optional[FeatureIndex]:
+        """Load the persisted feature index, rebuilding it if missing or stale"""
+        try:
+            path = self.artifact_path('feature_index', base_dir)
+            if os.path.exists(path):
+                feature_index = FeatureIndex.load(path)
+                if feature_index.num_menus == len(menus):
+                    return feature_index
+                logger.warning("Feature index does not match the catalog, rebuilding it")
+            return FeatureIndex.build(full_menus())
+        except Exception as e:
+            logger.error(f"Error loading feature index: {e}")
+            return None
+
+    def _load_tfidf_index(self, menus: pd.DataFrame, base_dir: str,
+                          full_menus: Callable[[], pd.DataFrame]) -> Optional[TfidfIndex]:
+        """Load the persisted TF-IDF index, refitting it if missing or stale; None while its weight is 0"""
+        if SEARCH_CONFIG.get('tfidf_weight', 0.0) <= 0:
+            return None
+        try:
+            path = self.artifact_path('tfidf_index', base_dir)
+            if os.path.exists(path):
+                tfidf_index = TfidfIndex.load(path)
+                if tfidf_index.num_menus == len(menus):
+                    return tfidf_index
+                logger.warning("TF-IDF index does not match the catalog, refitting it")
+            return TfidfIndex.fit([TextProcessor.build_menu_text(menu) for _, menu in full_menus().iterrows()])
+        except Exception as e:
+            logger.error(f"Error loading TF-IDF index: {e}")
+            return None
+
+    def _load_text_index(self, menus: pd.DataFrame, base_dir: str,
+                         full_menus: Callable[[], pd.DataFrame]) -> Optional[TextIndex]:
+        """Load the persisted text token index, rebuilding it if missing or stale"""
+        try:
+            path = self.artifact_path('text_index', base_dir)
+            if os.path.exists(path):
+                text_index = TextIndex.load(path)
+                if text_index.num_menus == len(menus):
+                    return text_index
+                logger.warning("Text index does not match the catalog, rebuilding it")
+            return TextIndex.build(full_menus())
+        except Exception as e:
+            logger.error(f"Error loading text index: {e}")
+            return None
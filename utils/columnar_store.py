@@ -0,0 +1,125 @@
+import os
+import json
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = 'columns.json'
+
+# Numeric, boolean and datetime columns are stored as raw .npy arrays and memory-mapped
+ARRAY_KINDS = 'biufM'
+
+class ColumnarMenus:
+    """Menu catalog stored column by column: memory-mapped arrays plus offset-encoded text and object cells
+
+    Array columns back the in-memory frame without copying, so worker processes share their pages.
+    Text and object columns stay on disk until decode() is asked for specific rows.
+    """
+
+    def __init__(self, path: str, num_menus: int, columns: List[str], arrays: Dict[str, np.ndarray],
+                 cells: Dict[str, tuple]):
+        self.path = path
+        self.num_menus = num_menus
+        self.columns = columns
+        self.arrays = arrays
+        self.cells = cells
+
+    @staticmethod
+    def write(menus_df: pd.DataFrame, path: str) -> None:
+        """Store every column of menus_df (by row position) in the directory path"""
+        os.makedirs(path, exist_ok=True)
+        schema = []
+        for column in menus_df.columns:
+            values = menus_df[column]
+            if isinstance(values.dtype, np.dtype) and values.dtype.kind in ARRAY_KINDS:
+                np.save(os.path.join(path, f"{column}.npy"), values.to_numpy())
+                schema.append({'name': column, 'kind': 'array'})
+                continue
+
+            cells = values.tolist()
+            if all(isinstance(value, str) for value in cells):
+                kind, encoded = 'str', [value.encode('utf-8') for value in cells]
+            else:
+                kind, encoded = 'pickle', [pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL) for value in cells]
+
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            np.save(os.path.join(path, f"{column}.offsets.npy"), offsets)
+            with open(os.path.join(path, f"{column}.data"), 'wb') as f:
+                f.write(b''.join(encoded))
+            schema.append({'name': column, 'kind': kind})
+
+        with open(os.path.join(path, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'num_menus': len(menus_df), 'columns': schema}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, exclude: Iterable[str] = ()) -> 'ColumnarMenus':
+        """Memory-map a store written by write(), leaving out the excluded columns"""
+        with open(os.path.join(path, SCHEMA_FILE), 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+
+        exclude = set(exclude)
+        columns, arrays, cells = [], {}, {}
+        for entry in schema['columns']:
+            name, kind = entry['name'], entry['kind']
+            if name in exclude:
+                continue
+            columns.append(name)
+            if kind == 'array':
+                arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                continue
+
+            offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode='r')
+            data_path = os.path.join(path, f"{name}.data")
+            # np.memmap cannot map an empty file
+            data = (np.memmap(data_path, dtype=np.uint8, mode='r') if os.path.getsize(data_path)
+                    else np.empty(0, dtype=np.uint8))
+            cells[name] = (kind, offsets, data)
+        return cls(path, schema['num_menus'], columns, arrays, cells)
+
+    @property
+    def lazy_columns(self) -> List[str]:
+        """Columns decoded on demand"""
+        return [column for column in self.columns if column in self.cells]
+
+    def frame(self) -> pd.DataFrame:
+        """Array columns as a DataFrame over the memory maps, indexed by row position"""
+        return pd.DataFrame({column: self.arrays[column] for column in self.columns if column in self.arrays},
+                            index=pd.RangeIndex(self.num_menus), copy=False)
+
+    def decode(self, column: str, positions: np.ndarray) -> List:
+        """Values of a text or object column at the given row positions"""
+        kind, offsets, data = self.cells[column]
+        positions = np.asarray(positions, dtype=np.int64)
+        bounds = zip(offsets[positions].tolist(), offsets[positions + 1].tolist())
+        view = memoryview(data)
+        if kind == 'str':
+            return [str(view[start:end], 'utf-8') for start, end in bounds]
+        return [pickle.loads(view[start:end]) for start, end in bounds]
+
+    def materialize(self, frame: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """frame (indexed by row position) with the lazy columns it lacks decoded for its rows"""
+        missing = [column for column in (columns or self.lazy_columns) if column not in frame.columns]
+        if not missing:
+            return frame
+
+        positions = frame.index.to_numpy()
+        decoded = {column: self.decode(column, positions) for column in missing}
+        data = {}
+        for column in self.columns:
+            if column in decoded:
+                data[column] = decoded[column]
+            elif column in frame.columns:
+                data[column] = frame[column].to_numpy()
+        for column in frame.columns:
+            if column not in data:
+                data[column] = frame[column].to_numpy()
+        return pd.DataFrame(data, index=frame.index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Fully decoded catalog"""
+        return self.materialize(self.frame())
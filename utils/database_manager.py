@@ -1,7 +1,7 @@
 import logging
 import pandas as pd
 import mysql.connector
-from typing import Optional
+from typing import Iterator, Optional
 from config.database_config import MYSQL_CONFIG 
 from utils.text_processor import TextProcessor
 
@@ -52,25 +52,8 @@ class DatabaseManager:
                 return df
             
             original_count = len(df)
-            
-            df = df.dropna(subset=['title'])
-            df = df[df['title'].astype(str).str.len() > 2]
-            
-            df['numeric_price'] = df['price'].apply(
-                lambda x: TextProcessor.extract_numeric_price(x) if pd.notna(x) else 0
-            )
-            
-            for col in ['ingredients', 'description', 'image']:
-                if col not in df.columns:
-                    df[col] = ''
-                else:
-                    df[col] = df[col].fillna('')
-            
-            df['source'] = 'MySQL'
-            df['is_available'] = True
-            
-            cleaned_count = len(df)
-            logger.info(f"Available menus: {original_count} → {cleaned_count} restaurant menu items")
+            df = DatabaseManager.clean_menus(df)
+            logger.info(f"Available menus: {original_count} → {len(df)} restaurant menu items")
             
             return df
             
@@ -81,6 +64,71 @@ class DatabaseManager:
             if connection and connection.is_connected():
                 connection.close()
     
+    @staticmethod
+    def clean_menus(df: pd.DataFrame) -> pd.DataFrame:
+        """Drop untitled menus and fill the derived and optional columns of freshly read rows"""
+        df = df.dropna(subset=['title'])
+        df = df[df['title'].astype(str).str.len() > 2]
+        
+        df['numeric_price'] = df['price'].apply(
+            lambda x: TextProcessor.extract_numeric_price(x) if pd.notna(x) else 0
+        )
+        
+        for col in ['ingredients', 'description', 'image']:
+            if col not in df.columns:
+                df[col] = ''
+            else:
+                df[col] = df[col].fillna('')
+        
+        df['source'] = 'MySQL'
+        df['is_available'] = True
+        return df
+    
+    @staticmethod
+    def count_menus() -> Optional[int]:
+        """Number of rows in the menu table (before cleaning), or None when it cannot be read"""
+        connection = None
+        try:
+            connection = DatabaseManager.get_connection()
+            if not connection:
+                return None
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM makanan")
+            return int(cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning(f"Could not count menus: {e}")
+            return None
+        finally:
+            if connection and connection.is_connected():
+                connection.close()
+    
+    @staticmethod
+    def iter_available_menus(chunk_size: int = 2000) -> Iterator[pd.DataFrame]:
+        """Available menus in id order, read and cleaned chunk_size rows at a time"""
+        connection = None
+        try:
+            connection = DatabaseManager.get_connection()
+            if not connection:
+                logger.error("Failed to connect to MySQL database")
+                return
+            
+            query = "SELECT id, title, price, image, ingredients, description FROM makanan ORDER BY id ASC"
+            loaded = kept = 0
+            for chunk in pd.read_sql(query, connection, chunksize=chunk_size):
+                loaded += len(chunk)
+                chunk = DatabaseManager.clean_menus(chunk)
+                kept += len(chunk)
+                if len(chunk):
+                    yield chunk
+            logger.info(f"Streamed available menus: {loaded} → {kept} restaurant menu items")
+            
+        except Exception as e:
+            logger.error(f"Error streaming data from MySQL: {e}")
+            raise
+        finally:
+            if connection and connection.is_connected():
+                connection.close()
+    
     @staticmethod
     def get_database_stats(df: pd.DataFrame) -> dict:
         """Generate comprehensive database statistics"""
@@ -104,12 +152,7 @@ class DatabaseManager:
             
             for _, menu in df.iterrows():
                 try:
-                    title = str(menu.get('title', ''))
-                    ingredients = str(menu.get('ingredients', ''))
-                    description = str(menu.get('description', ''))
-                    full_text = f"{title} {ingredients} {description}".lower()
-                    
-                    features = TextProcessor.extract_features(full_text)
+                    features = TextProcessor.get_menu_features(menu)
                     
                     # Count proteins
                     if 'protein' in features:
@@ -0,0 +1,179 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+from config.model_config import MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 'torch' is the full-precision SentenceTransformer reference; the others are CPU inference variants of it
+BACKENDS = ('torch', 'int8', 'onnx', 'onnx_int8')
+ONNX_BACKENDS = ('onnx', 'onnx_int8')
+
+BACKEND_INFO_FILE = 'backend.json'
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_FP32_FILE = 'model_fp32.onnx'
+
+# Fixed menu-style texts embedded by both the reference and the candidate backend to measure drift
+DRIFT_PROBES = [
+    "nasi goreng ayam pedas dengan telur mata sapi",
+    "sate kambing bumbu kacang manis",
+    "soto ayam kuah bening dengan soun dan kol",
+    "ikan bakar sambal matah khas bali",
+    "udang goreng tepung renyah saus asam manis",
+    "gado gado sayuran rebus saus kacang vegetarian",
+    "rendang daging sapi padang santan pedas",
+    "mie ayam jamur bakso pangsit",
+    "tahu tempe bacem manis gurih",
+    "cumi hitam tumis cabai hijau",
+    "sup iga sapi bening wortel kentang",
+    "ayam bakar madu kecap",
+    "pecel lele sambal terasi lalapan",
+    "kepiting saus padang pedas",
+    "capcay kuah sayuran jamur tahu",
+    "es campur buah kelapa muda sirup",
+    "makanan",
+    "resep masakan rumahan sederhana untuk keluarga dengan bahan bawang putih bawang merah cabai "
+    "tomat garam gula dan kaldu ayam dimasak perlahan sampai bumbu meresap"
+]
+
+class OnnxEncoder:
+    """Sentence encoder over an exported transformer graph on onnxruntime, with mean pooling"""
+
+    def __init__(self, path: str, max_seq_length: int = 256, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.session = ort.InferenceSession(os.path.join(path, ONNX_MODEL_FILE), options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.dim = int(self.session.get_outputs()[0].shape[-1])
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """Mean-pooled token embeddings, batched longest-first so each batch pads to similar lengths"""
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            tokens = self.tokenizer([texts[row] for row in rows], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors='np')
+            feeds = {}
+            for name in self.input_names:
+                values = tokens[name] if name in tokens else np.zeros_like(tokens['input_ids'])
+                feeds[name] = values.astype(np.int64)
+            hidden = self.session.run(None, feeds)[0]
+            mask = tokens['attention_mask'][..., None].astype(np.float32)
+            embeddings[rows] = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+class EmbeddingBackends:
+    """Builds CPU inference backends from the reference SentenceTransformer and checks their drift"""
+
+    @staticmethod
+    def export_path(model_name: str, backend: str) -> str:
+        """Directory of a model's exported ONNX backend"""
+        return os.path.join(MODEL_CONFIG['models_dir'], MODEL_CONFIG.get('backend_dir', 'embedding_backends'),
+                            f"{model_name.replace('/', '__')}__{backend}")
+
+    @staticmethod
+    def read_info(path: str) -> Optional[Dict]:
+        """Export record (drift, acceptance) of an exported backend, or None if it is incomplete"""
+        try:
+            with open(os.path.join(path, BACKEND_INFO_FILE), 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            return info if os.path.exists(os.path.join(path, ONNX_MODEL_FILE)) else None
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def load_exported(model_name: str, backend: str):
+        """Previously exported and accepted ONNX encoder, without importing torch; (None, None) otherwise"""
+        path = EmbeddingBackends.export_path(model_name, backend)
+        info = EmbeddingBackends.read_info(path)
+        if not info or not info.get('accepted'):
+            return None, None
+        encoder = OnnxEncoder(path, info.get('max_seq_length', 256), MODEL_CONFIG.get('inference_threads'))
+        return encoder, info
+
+    @staticmethod
+    def build(reference, model_name: str, backend: str):
+        """Backend encoder derived from the reference model, plus its drift record
+
+        The encoder is only returned when its drift is within max_backend_drift; otherwise (None, info).
+        """
+        if backend == 'int8':
+            import torch
+            encoder = torch.quantization.quantize_dynamic(reference.to('cpu'), {torch.nn.Linear}, dtype=torch.qint8)
+            info = {'backend': backend}
+        elif backend in ONNX_BACKENDS:
+            path = EmbeddingBackends.export_path(model_name, backend)
+            EmbeddingBackends._export_onnx(reference, path, quantize=backend == 'onnx_int8')
+            info = {'backend': backend, 'max_seq_length': reference.max_seq_length}
+            encoder = OnnxEncoder(path, reference.max_seq_length, MODEL_CONFIG.get('inference_threads'))
+        else:
+            raise ValueError(f"Unknown embedding backend '{backend}'")
+
+        info['drift'] = EmbeddingBackends.measure_drift(reference, encoder)
+        info['accepted'] = info['drift']['min_cosine'] >= 1.0 - MODEL_CONFIG.get('max_backend_drift', 0.02)
+        if backend in ONNX_BACKENDS:
+            path = EmbeddingBackends.export_path(model_name, backend)
+            with open(os.path.join(path, BACKEND_INFO_FILE), 'w', encoding='utf-8') as f:
+                json.dump(info, f, indent=2)
+        return (encoder if info['accepted'] else None), info
+
+    @staticmethod
+    def measure_drift(reference, encoder, texts: Optional[List[str]] = None) -> Dict[str, float]:
+        """Cosine similarity between reference and backend embeddings of the probe texts"""
+        texts = texts or DRIFT_PROBES
+        expected = np.asarray(reference.encode(texts, convert_to_numpy=True), dtype=np.float32)
+        actual = np.asarray(encoder.encode(texts, convert_to_numpy=True), dtype=np.float32)
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+        actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+        cosine = (expected * actual).sum(axis=1)
+        return {
+            'probes': len(texts),
+            'min_cosine': round(float(cosine.min()), 6),
+            'mean_cosine': round(float(cosine.mean()), 6)
+        }
+
+    @staticmethod
+    def _export_onnx(reference, path: str, quantize: bool) -> None:
+        """Export the reference model's transformer to ONNX (dynamically quantized to int8 if asked)"""
+        import torch
+        modules = [type(module).__name__ for module in reference]
+        pooling = reference[1] if len(reference) > 1 else None
+        if (modules[:2] != ['Transformer', 'Pooling'] or set(modules[2:]) - {'Normalize'} or
+                not getattr(pooling, 'pooling_mode_mean_tokens', False)):
+            raise ValueError(f"Only mean-pooled transformer models can be exported, got {modules}")
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        transformer = reference[0].auto_model.to('cpu').eval()
+        reference.tokenizer.save_pretrained(path)
+        sample = reference.tokenizer(DRIFT_PROBES[:2], padding=True, return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+        fp32_path = os.path.join(path, ONNX_FP32_FILE if quantize else ONNX_MODEL_FILE)
+        with torch.no_grad():
+            torch.onnx.export(transformer, tuple(sample[name] for name in input_names), fp32_path,
+                              input_names=input_names, output_names=['last_hidden_state'],
+                              dynamic_axes=dynamic_axes, opset_version=14, do_constant_folding=True)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(fp32_path, os.path.join(path, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+            os.remove(fp32_path)
+        logger.info(f"Exported {'int8 ' if quantize else ''}ONNX embedding model to {path}")
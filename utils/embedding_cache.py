@@ -0,0 +1,128 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import numpy as np
+from typing import Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent content-addressed store of normalized embeddings, one file per model"""
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._rows = {}
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        # Rows stored since the last save or retain, stacked onto _vectors once instead of on every store
+        self._pending = []
+        # Keys asked for since loading, so a chunked ingest can evict everything else at the end
+        self.seen = set()
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Content hash identifying the embedding of a processed text under a model"""
+        return hashlib.sha256(f"{model_name}\x00{text}".encode('utf-8')).hexdigest()
+
+    @classmethod
+    def load(cls, path: str, dim: int) -> 'EmbeddingCache':
+        """Open the cache file, starting empty when it is missing, unreadable or for another dimension"""
+        cache = cls(path, dim)
+        if not os.path.exists(path):
+            return cache
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys = [key.decode('ascii') for key in data['keys']]
+                vectors = data['vectors'].astype(np.float32, copy=False)
+            if vectors.ndim != 2 or vectors.shape[1] != dim or len(keys) != len(vectors):
+                logger.warning(f"Embedding cache {path} does not match dimension {dim}, starting empty")
+                return cache
+            cache._rows = {key: row for row, key in enumerate(keys)}
+            cache._vectors = vectors
+        except Exception as e:
+            logger.warning(f"Could not read embedding cache {path}, starting empty: {e}")
+        return cache
+
+    def lookup(self, keys: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """Cached vectors for keys (zero rows where missing) and the positions that were missing"""
+        embeddings = np.zeros((len(keys), self.dim), dtype=np.float32)
+        missing = []
+        with self._lock:
+            self.seen.update(keys)
+            found_positions, found_rows = [], []
+            stacked = len(self._vectors)
+            for position, key in enumerate(keys):
+                row = self._rows.get(key)
+                if row is None:
+                    missing.append(position)
+                elif row >= stacked:
+                    embeddings[position] = self._pending[row - stacked]
+                else:
+                    found_positions.append(position)
+                    found_rows.append(row)
+            if found_rows:
+                embeddings[found_positions] = self._vectors[found_rows]
+        return embeddings, missing
+
+    def store(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Add vectors for new keys"""
+        with self._lock:
+            new_keys = [key for key in dict.fromkeys(keys) if key not in self._rows]
+            if not new_keys:
+                return
+            first_row = {}
+            for position, key in enumerate(keys):
+                first_row.setdefault(key, position)
+            start = len(self._vectors) + len(self._pending)
+            self._pending.extend(vectors[[first_row[key] for key in new_keys]])
+            for offset, key in enumerate(new_keys):
+                self._rows[key] = start + offset
+            self.dirty = True
+
+    def retain(self, keys: Iterable[str]) -> int:
+        """Evict every entry whose key is not in keys; returns the number evicted"""
+        with self._lock:
+            keep = [key for key in dict.fromkeys(keys) if key in self._rows]
+            evicted = len(self._rows) - len(keep)
+            if evicted:
+                self._stack_pending()
+                self._vectors = self._vectors[[self._rows[key] for key in keep]]
+                self._rows = {key: row for row, key in enumerate(keep)}
+                self.dirty = True
+            return evicted
+
+    def save(self) -> None:
+        """Write the cache atomically next to its final path"""
+        with self._lock:
+            self._stack_pending()
+            keys = [None] * len(self._rows)
+            for key, row in self._rows.items():
+                keys[row] = key
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # A unique temporary file, so concurrent saves never write into each other's file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, keys=np.array(keys, dtype='S64'), vectors=self._vectors)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self.dirty = False
+
+    def _stack_pending(self) -> None:
+        """Append the pending rows to the vector matrix; caller holds the lock"""
+        if self._pending:
+            self._vectors = np.vstack([self._vectors, np.asarray(self._pending, dtype=np.float32)])
+            self._pending = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
@@ -0,0 +1,122 @@
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+from config.model_config import MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingService:
+    """Embeds query texts on one worker thread, batching the requests that arrive within batch_wait_ms
+
+    Concurrent callers block on their own future while the worker runs a single encode for the whole
+    batch, so the model sees one batched call instead of many contending single-text calls.
+    """
+
+    def __init__(self, model_manager, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None,
+                 max_queue: Optional[int] = None):
+        self.model_manager = model_manager
+        self.max_batch_size = max(1, int(max_batch_size or MODEL_CONFIG.get('batch_size', 32)))
+        self.max_wait = (MODEL_CONFIG.get('batch_wait_ms', 5) if max_wait_ms is None else max_wait_ms) / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue or MODEL_CONFIG.get('embed_queue_size', 256))
+        self._lock = threading.Lock()
+        self._worker = None
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+        self.total_wait_ms = 0.0
+        self.total_encode_ms = 0.0
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Embedding of one text as a (1, dim) array, like embed_texts([text]); empty on failure"""
+        # A cold model is loaded in the caller's thread so the queue only ever waits on encoding
+        if not self.model_manager.ensure_loaded():
+            return np.array([])
+        self._ensure_worker()
+
+        request = Future()
+        try:
+            self._queue.put_nowait((text, time.perf_counter(), request))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Embedding queue is full, encoding the query directly")
+            return self.model_manager.embed_texts([text])
+
+        with self._lock:
+            self.requests += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        try:
+            return request.result(timeout=timeout or MODEL_CONFIG.get('embed_timeout', 10))
+        except Exception as e:
+            logger.error(f"Error waiting for query embedding: {e}")
+            return np.array([])
+
+    def _ensure_worker(self) -> None:
+        """Start the batching thread on first use"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Collect up to max_batch_size requests, waiting at most max_wait after the first, then encode"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch) -> None:
+        """Encode one batch and resolve each caller's future with its own row"""
+        start = time.perf_counter()
+        try:
+            embeddings = self.model_manager.embed_texts([text for text, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Error encoding embedding batch: {e}")
+            embeddings = np.array([])
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        ok = embeddings.ndim == 2 and len(embeddings) == len(batch)
+        for row, (_, _, request) in enumerate(batch):
+            request.set_result(embeddings[row:row + 1] if ok else np.array([]))
+
+        with self._lock:
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+            self.total_wait_ms += sum((start - queued_at) * 1000 for _, queued_at, _ in batch)
+            self.total_encode_ms += encode_ms
+            if not ok:
+                self.failed += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, batch-size and queue-depth metrics"""
+        with self._lock:
+            embedded = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'avg_batch_size': round(embedded / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': max(self.batch_sizes) if self.batch_sizes else 0,
+                'batch_size_counts': dict(sorted(self.batch_sizes.items())),
+                'avg_wait_ms': round(self.total_wait_ms / embedded, 3) if embedded else 0.0,
+                'avg_encode_ms': round(self.total_encode_ms / self.batches, 3) if self.batches else 0.0
+            }
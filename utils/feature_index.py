@@ -0,0 +1,88 @@
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from utils.text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+class FeatureIndex:
+    """Inverted index from FOOD_KEYWORDS feature values to sorted menu row positions"""
+
+    def __init__(self, postings: Dict[str, Dict[str, np.ndarray]], num_menus: int):
+        self.postings = postings
+        self.num_menus = num_menus
+        self._columns = {}
+        self._matrix = None
+
+    @classmethod
+    def build(cls, menus_df: pd.DataFrame) -> 'FeatureIndex':
+        """Build posting lists from the stored per-menu features"""
+        positions_by_value = {}
+
+        for position, (_, menu) in enumerate(menus_df.iterrows()):
+            features = TextProcessor.get_menu_features(menu)
+            for category, values in features.items():
+                category_postings = positions_by_value.setdefault(category, {})
+                for value in values:
+                    category_postings.setdefault(value, []).append(position)
+
+        postings = {
+            category: {value: np.array(positions, dtype=np.int32) for value, positions in values.items()}
+            for category, values in positions_by_value.items()
+        }
+        logger.info(f"Built feature index: {sum(len(v) for v in postings.values())} values over {len(menus_df)} menus")
+        return cls(postings, len(menus_df))
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureIndex':
+        """Load a feature index written by save()"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return cls(data['postings'], data['num_menus'])
+
+    def save(self, path: str) -> None:
+        """Persist the posting lists next to the catalog"""
+        with open(path, 'wb') as f:
+            pickle.dump({'postings': self.postings, 'num_menus': self.num_menus}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get_postings(self, category: str, value: str) -> np.ndarray:
+        """Sorted row positions of menus that have the given feature value"""
+        return self.postings.get(category, {}).get(value, np.empty(0, dtype=np.int32))
+
+    def match_counts(self, query_features: Dict[str, List[str]]) -> np.ndarray:
+        """Number of required feature values each menu satisfies"""
+        counts = np.zeros(self.num_menus, dtype=np.int32)
+        for category, values in query_features.items():
+            for value in values:
+                postings = self.get_postings(category, value)
+                if postings.size:
+                    counts[postings] += 1
+        return counts
+
+    def value_matrix(self, category: str, values: List[str], positions: np.ndarray) -> np.ndarray:
+        """Boolean matrix (menus x values) telling which of the given feature values each menu has"""
+        if self._matrix is None:
+            self._build_matrix()
+
+        matrix = np.zeros((len(positions), len(values)), dtype=bool)
+        for j, value in enumerate(values):
+            column = self._columns.get((category, value))
+            if column is not None:
+                matrix[:, j] = self._matrix[positions, column]
+        return matrix
+
+    def _build_matrix(self) -> None:
+        """Dense menus x feature-values boolean matrix built from the posting lists"""
+        columns = {}
+        for category, values in self.postings.items():
+            for value in values:
+                columns[(category, value)] = len(columns)
+
+        matrix = np.zeros((self.num_menus, len(columns)), dtype=bool)
+        for (category, value), column in columns.items():
+            matrix[self.postings[category][value], column] = True
+
+        self._columns = columns
+        self._matrix = matrix
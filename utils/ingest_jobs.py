@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from config.model_config import MODEL_CONFIG, INGEST_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: fall back to checking the status files of running jobs
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATES = ('succeeded', 'failed', 'cancelled', 'interrupted', 'rejected')
+LOCK_FILE = 'ingest.lock'
+
+class IngestJob:
+    """One ingest run: id, state, stage, pipeline progress and the messages it produced
+
+    Also acts as the dispatcher of a background run, so the ingest code reports to it unchanged.
+    The status file lets other processes (the chat status action, the CLI) follow and cancel the job.
+    """
+
+    def __init__(self, jobs_dir: str, source: str = 'action'):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.jobs_dir = jobs_dir
+        self.source = source
+        self.state = 'queued'
+        self.stage = 'queued'
+        self.progress = {}
+        self.messages = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.pid = os.getpid()
+        self._cancel = threading.Event()
+        self._pipeline = None
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    @property
+    def status_path(self) -> str:
+        return os.path.join(self.jobs_dir, f"{self.job_id}.json")
+
+    @property
+    def cancel_path(self) -> str:
+        return os.path.join(self.jobs_dir, f"{self.job_id}.cancel")
+
+    def utter_message(self, text: Optional[str] = None, **kwargs) -> None:
+        """Dispatcher interface: keep the message for the status report"""
+        if text:
+            with self._lock:
+                self.messages.append(text)
+            logger.info(f"Ingest job {self.job_id}: {text.splitlines()[0]}")
+
+    def set_stage(self, stage: str) -> None:
+        with self._lock:
+            self.stage = stage
+        self.save(force=True)
+
+    def attach(self, pipeline) -> None:
+        """Pipeline to stop when the job is cancelled"""
+        self._pipeline = pipeline
+        if self.cancel_requested:
+            pipeline.cancel()
+
+    def update_progress(self, snapshot: Dict) -> None:
+        """Pipeline progress callback"""
+        with self._lock:
+            self.progress = dict(snapshot)
+        if self.cancel_requested and self._pipeline is not None:
+            self._pipeline.cancel()
+        self.save()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        if self._pipeline is not None:
+            self._pipeline.cancel()
+
+    @property
+    def cancel_requested(self) -> bool:
+        # Another process asks for cancellation through the marker file
+        if not self._cancel.is_set() and os.path.exists(self.cancel_path):
+            self._cancel.set()
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raise between stages once cancellation was requested"""
+        if self.cancel_requested:
+            raise InterruptedError("Ingest cancelled")
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'source': self.source,
+                'state': self.state,
+                'stage': self.stage,
+                'progress': dict(self.progress),
+                'messages': list(self.messages[-5:]),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'pid': self.pid
+            }
+
+    def save(self, force: bool = False) -> None:
+        """Write the status file atomically, at most once a second unless forced"""
+        now = time.time()
+        if not force and now - self._saved_at < INGEST_CONFIG.get('status_interval', 1.0):
+            return
+        self._saved_at = now
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            tmp_path = self.status_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, self.status_path)
+        except Exception as e:
+            logger.warning(f"Could not write ingest job status: {e}")
+
+class IngestJobManager:
+    """Runs at most one ingest job at a time across processes sharing models_dir and reports on all of them
+
+    The running job holds an exclusive lock on jobs_dir/ingest.lock, so the action server and the CLI never
+    write versions, CURRENT or the embedding cache concurrently. The OS drops the lock if the process dies.
+    """
+
+    def __init__(self, jobs_dir: Optional[str] = None):
+        self.jobs_dir = jobs_dir or os.path.join(MODEL_CONFIG['models_dir'], INGEST_CONFIG.get('jobs_dir', 'ingest_jobs'))
+        self._lock = threading.Lock()
+        self._active = None
+        self._latest = None
+        self._lock_fd = None
+
+    def create(self, source: str = 'action') -> IngestJob:
+        return IngestJob(self.jobs_dir, source)
+
+    def start(self, target: Callable[[IngestJob], bool], source: str = 'action') -> Tuple[Dict, bool]:
+        """Run target(job) on a background thread; returns the job status and whether it was newly started
+
+        While a job of this or another process is running, its status is returned instead.
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active.to_dict(), False
+            if not self._acquire():
+                return self._running_status(), False
+            job = self.create(source)
+            self._active = self._latest = job
+        job.save(force=True)
+        threading.Thread(target=self._run_locked, args=(job, target), name=f"ingest-{job.job_id}",
+                         daemon=True).start()
+        return job.to_dict(), True
+
+    def run(self, job: IngestJob, target: Callable[[IngestJob], bool]) -> bool:
+        """Run target(job) in the calling thread and record its final state
+
+        The job is rejected, without a status file, while another job holds the ingest lock.
+        """
+        with self._lock:
+            acquired = self._active is None and self._acquire()
+            if acquired:
+                self._active = self._latest = job
+        if not acquired:
+            running = self._active.to_dict() if self._active is not None else self._running_status()
+            job.state, job.stage, job.finished_at = 'rejected', 'finished', time.time()
+            job.utter_message(text=f"Ingest job {running.get('job_id', '-')} masih berjalan, "
+                                   f"coba lagi setelah selesai.")
+            return False
+        return self._run_locked(job, target)
+
+    def _run_locked(self, job: IngestJob, target: Callable[[IngestJob], bool]) -> bool:
+        """Run target(job) while holding the ingest lock, releasing it when the job ends"""
+        job.state, job.stage, job.started_at = 'running', 'starting', time.time()
+        job.save(force=True)
+        succeeded = False
+        try:
+            succeeded = bool(target(job))
+        except InterruptedError:
+            logger.info(f"Ingest job {job.job_id} cancelled")
+        except Exception as e:
+            logger.error(f"Ingest job {job.job_id} failed: {e}")
+            job.utter_message(text=f"Terjadi kesalahan: {str(e)}")
+        finally:
+            if succeeded:
+                job.state = 'succeeded'
+            else:
+                job.state = 'cancelled' if job.cancel_requested else 'failed'
+            job.stage, job.finished_at = 'finished', time.time()
+            job.save(force=True)
+            with self._lock:
+                if self._active is job:
+                    self._active = None
+                self._release()
+            self._prune()
+        return succeeded
+
+    def active(self) -> Optional[IngestJob]:
+        return self._active
+
+    def status(self, job_id: Optional[str] = None) -> Optional[Dict]:
+        """Status of a job (default: the most recent one, from this or another process)"""
+        latest = self._latest
+        job_id = job_id or self._newest_file_id() or (latest.job_id if latest else None)
+        if not job_id:
+            return None
+        if latest is not None and latest.job_id == job_id:
+            return latest.to_dict()
+        return self._read_status(job_id)
+
+    def cancel(self, job_id: Optional[str] = None) -> Optional[Dict]:
+        """Request cancellation of a running job; returns its status, or None if nothing is running"""
+        status = self.status(job_id)
+        if not status or status['state'] in FINAL_STATES:
+            return None
+        job = self._active
+        if job is not None and job.job_id == status['job_id']:
+            job.cancel()
+        else:
+            # Running in another process: leave a marker it picks up between chunks
+            try:
+                with open(os.path.join(self.jobs_dir, f"{status['job_id']}.cancel"), 'w') as f:
+                    f.write(str(time.time()))
+            except Exception as e:
+                logger.warning(f"Could not request cancellation of ingest job {status['job_id']}: {e}")
+                return None
+        status['cancel_requested'] = True
+        return status
+
+    def _acquire(self) -> bool:
+        """Take the cross-process ingest lock without blocking; caller holds self._lock"""
+        if fcntl is None:
+            status = self.status()
+            return not status or status['state'] in FINAL_STATES
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            fd = os.open(os.path.join(self.jobs_dir, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning(f"Could not open the ingest lock file: {e}")
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release(self) -> None:
+        """Drop the cross-process ingest lock; caller holds self._lock"""
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _running_status(self) -> Dict:
+        """Status of the job another process is running, as far as its status file tells"""
+        status = self.status()
+        if status and status['state'] not in FINAL_STATES:
+            return status
+        return {'job_id': '-', 'source': 'other', 'state': 'running', 'stage': '-'}
+
+    def _status_files(self) -> List[str]:
+        try:
+            files = [name for name in os.listdir(self.jobs_dir) if name.endswith('.json')]
+        except OSError:
+            return []
+        return sorted(files, key=lambda name: os.path.getmtime(os.path.join(self.jobs_dir, name)))
+
+    def _newest_file_id(self) -> Optional[str]:
+        files = self._status_files()
+        return files[-1][:-len('.json')] if files else None
+
+    def _read_status(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.jobs_dir, f"{job_id}.json"), 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if status.get('state') not in FINAL_STATES and not self._pid_alive(status.get('pid')):
+            # The process running it exited without recording a final state
+            status['state'] = 'interrupted'
+        return status
+
+    @staticmethod
+    def _pid_alive(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def _prune(self) -> None:
+        """Drop status and cancel files of all but the most recent keep_jobs jobs"""
+        files = self._status_files()
+        for name in files[:max(0, len(files) - INGEST_CONFIG.get('keep_jobs', 20))]:
+            job_id = name[:-len('.json')]
+            for path in (os.path.join(self.jobs_dir, name), os.path.join(self.jobs_dir, f"{job_id}.cancel")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def describe_status(status: Optional[Dict]) -> str:
+    """Chat/CLI summary of a job status"""
+    if not status:
+        return "Belum ada ingest yang dijalankan."
+
+    lines = [f"📦 Ingest job {status['job_id']} ({status.get('source', 'action')}): "
+             f"{status['state']} — tahap {status.get('stage', '-')}"]
+    progress = status.get('progress') or {}
+    done, total = progress.get('rows_embedded', 0), progress.get('total')
+    if progress:
+        percent = f" ({min(done / total, 1.0):.0%})" if total else ""
+        eta = progress.get('eta_s')
+        lines.append(f"Progres: {done}/{total or '?'} menu{percent}, {progress.get('rows_per_s', 0)} menu/s"
+                     + (f", ETA {eta:.0f} s" if eta and status['state'] == 'running' else ""))
+    if status.get('started_at'):
+        elapsed = (status.get('finished_at') or time.time()) - status['started_at']
+        lines.append(f"Durasi: {elapsed:.0f} s")
+    if status.get('cancel_requested') and status['state'] not in FINAL_STATES:
+        lines.append("Pembatalan diminta, berhenti setelah chunk yang sedang diproses.")
+    if status.get('messages'):
+        lines.append(f"Pesan terakhir: {status['messages'][-1].splitlines()[0]}")
+    return "\n".join(lines)
@@ -0,0 +1,252 @@
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from config.model_config import INGEST_CONFIG
+from utils.text_processor import TextProcessor
+from utils.catalog_delta import CatalogDelta
+from utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+# End-of-source marker on the chunk queue
+_DONE = object()
+
+class _ReadError:
+    """Exception raised by the chunk source, handed to the consuming thread"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+def prepare_menus(menus_df: pd.DataFrame) -> pd.DataFrame:
+    """Derive search text, features and dietary columns for freshly loaded menus"""
+    # Create enhanced search text
+    menus_df['search_text'] = menus_df.apply(
+        lambda row: TextProcessor.create_search_text(row) or "makanan", axis=1
+    )
+
+    # Extract menu features once so search never re-derives them
+    menus_df['features'] = menus_df.apply(
+        lambda row: TextProcessor.extract_features(TextProcessor.build_menu_text(row)), axis=1
+    )
+
+    # Dietary classes used by the strict filters and random picks
+    return TextProcessor.add_dietary_columns(menus_df)
+
+def prepare_chunk(menus_df: pd.DataFrame) -> pd.DataFrame:
+    """Pool task: content hashes plus prepare_menus for one chunk of database rows"""
+    if 'content_hash' not in menus_df.columns:
+        menus_df['content_hash'] = CatalogDelta.content_hashes(menus_df)
+    return prepare_menus(menus_df)
+
+class IngestPipeline:
+    """Streams menu chunks through reading, parallel preparation, embedding and index appends
+
+    A reader thread fills a bounded chunk queue, a process pool prepares a bounded number of chunks
+    ahead, and the calling thread embeds each prepared chunk in order while the other stages keep
+    working. Raw rows are released as soon as their chunk is prepared.
+
+    Only the raw rows and the chunks in flight are bounded by the queues. The prepared menus and the
+    index still grow to catalog size, because the catalog and its artifacts are written as a whole, so
+    peak memory stays O(catalog); index types that need training also hold every embedding until the end.
+    """
+
+    def __init__(self, model_manager, chunk_size: Optional[int] = None, workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, progress_callback: Optional[Callable[[Dict], None]] = None):
+        self.model_manager = model_manager
+        self.chunk_size = max(1, int(chunk_size or INGEST_CONFIG.get('chunk_size', 2000)))
+        if workers is None:
+            workers = INGEST_CONFIG.get('workers')
+        self.workers = max(0, (os.cpu_count() or 2) - 1) if workers is None else max(0, int(workers))
+        self.queue_size = max(1, int(queue_size or INGEST_CONFIG.get('queue_size', 4)))
+        self.progress_callback = progress_callback
+        self._stop = threading.Event()
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._progress = {}
+
+    @staticmethod
+    def split(menus_df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Consecutive row chunks of an in-memory frame"""
+        for start in range(0, len(menus_df), chunk_size):
+            yield menus_df.iloc[start:start + chunk_size].copy()
+
+    def progress(self) -> Dict:
+        """Snapshot of the rows through each stage, throughput and estimated time left"""
+        with self._lock:
+            return dict(self._progress)
+
+    def cancel(self) -> None:
+        """Ask a running pipeline to stop after the chunk it is embedding"""
+        self._cancelled = True
+        self._stop.set()
+
+    def run(self, chunks: Iterable[pd.DataFrame], total: Optional[int] = None) -> Tuple[pd.DataFrame, object, Dict]:
+        """Prepared menus, FAISS index keyed on menu id and its index_info; index is None if embedding failed"""
+        self._stop.clear()
+        self._cancelled = False
+        self._start = time.perf_counter()
+        self._progress = {'stage': 'running', 'total': total, 'chunks': 0, 'rows_read': 0, 'rows_prepared': 0,
+                          'rows_embedded': 0, 'reused': 0, 'encoded': 0, 'elapsed_s': 0.0, 'rows_per_s': 0.0,
+                          'eta_s': None, 'workers': 0}
+
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        reader = threading.Thread(target=self._read, args=(chunks, chunk_queue), name="ingest-reader", daemon=True)
+        reader.start()
+        pool = self._open_pool(total)
+        cache = self.model_manager.open_embedding_cache()
+
+        frames, parts, pending = [], [], deque()
+        index = index_info = None
+        finished = False
+        try:
+            source_done = False
+            while not source_done or pending:
+                if self._cancelled:
+                    raise InterruptedError("Ingest cancelled")
+
+                # Keep up to queue_size chunks in preparation, only blocking on the reader when idle
+                while not source_done and len(pending) < self.queue_size:
+                    try:
+                        item = chunk_queue.get(block=not pending)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        source_done = True
+                    elif isinstance(item, _ReadError):
+                        raise item.error
+                    else:
+                        self._update(rows_read=len(item))
+                        pending.append(pool.submit(prepare_chunk, item) if pool else self._run_inline(item))
+                if not pending:
+                    continue
+
+                prepared = pending.popleft().result()
+                self._update(rows_prepared=len(prepared))
+                embeddings = self.model_manager.embed_texts(prepared['search_text'].tolist(), use_cache=True,
+                                                            cache=cache)
+                if embeddings.size == 0:
+                    logger.error("Embedding a catalog chunk failed")
+                    self._finish('failed')
+                    return pd.concat(frames + [prepared], ignore_index=True), None, {}
+
+                if index is None and not parts and total:
+                    index, index_info = VectorIndex.streaming(total, embeddings.shape[1])
+                if index is not None:
+                    index.add_with_ids(embeddings, prepared['id'].to_numpy(dtype=np.int64))
+                else:
+                    parts.append(embeddings)
+                frames.append(prepared)
+
+                embed_stats = self.model_manager.last_embed_stats
+                self._update(chunks=1, rows_embedded=len(prepared), reused=embed_stats.get('reused', 0),
+                             encoded=embed_stats.get('encoded', 0))
+                self._report()
+            finished = True
+        finally:
+            if not finished and self._progress['stage'] == 'running':
+                self._finish('cancelled' if self._cancelled else 'failed')
+            self._stop.set()
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            evicted = self.model_manager.close_embedding_cache(cache, evict_orphans=finished)
+
+        if not frames:
+            self._finish('empty')
+            return pd.DataFrame(), None, {}
+
+        # Drop the per-chunk frames once combined so the catalog is not held twice while the index builds
+        menus_df = pd.concat(frames, ignore_index=True)
+        frames.clear()
+        ids = menus_df['id'].to_numpy(dtype=np.int64)
+        if index is None or index_info['resolved_type'] != VectorIndex.resolve_type(len(menus_df)):
+            # The row count estimate was off, or the configured index needs training on every vector
+            embeddings = np.vstack(parts) if index is None else VectorIndex.reconstruct(index)
+            parts.clear()
+            index, index_info = VectorIndex.build_checked(embeddings, ids)
+
+        with self._lock:
+            self.model_manager.last_embed_stats = {
+                'texts': self._progress['rows_embedded'],
+                'reused': self._progress['reused'],
+                'encoded': self._progress['encoded'],
+                'evicted': evicted,
+                'cache_size': len(cache),
+                'elapsed_ms': round((time.perf_counter() - self._start) * 1000, 2)
+            }
+        self._finish('done')
+        return menus_df, index, index_info
+
+    def _read(self, chunks: Iterable[pd.DataFrame], chunk_queue: queue.Queue) -> None:
+        """Reader thread: queue source chunks, blocking while the queue is full"""
+        try:
+            for chunk in chunks:
+                if len(chunk) and not self._put(chunk_queue, chunk):
+                    return
+            self._put(chunk_queue, _DONE)
+        except Exception as e:
+            self._put(chunk_queue, _ReadError(e))
+
+    def _put(self, chunk_queue: queue.Queue, item) -> bool:
+        """Queue an item, giving up once the pipeline stops"""
+        while not self._stop.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _open_pool(self, total: Optional[int]) -> Optional[ProcessPoolExecutor]:
+        """Process pool for preparation, or None when the catalog is too small to repay starting one"""
+        if self.workers < 1 or (total is not None and total < INGEST_CONFIG.get('min_parallel_rows', 5000)):
+            return None
+        try:
+            context = multiprocessing.get_context(INGEST_CONFIG.get('start_method', 'spawn'))
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            with self._lock:
+                self._progress['workers'] = self.workers
+            return pool
+        except Exception as e:
+            logger.warning(f"Could not start ingest worker processes, preparing menus inline: {e}")
+            return None
+
+    @staticmethod
+    def _run_inline(chunk: pd.DataFrame) -> Future:
+        future = Future()
+        future.set_result(prepare_chunk(chunk))
+        return future
+
+    def _update(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                self._progress[name] += value
+
+    def _report(self) -> None:
+        """Refresh throughput and ETA, log them and pass them to the progress callback"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._start
+            done, total = self._progress['rows_embedded'], self._progress['total']
+            rate = done / elapsed if elapsed > 0 else 0.0
+            self._progress.update(elapsed_s=round(elapsed, 2), rows_per_s=round(rate, 1),
+                                  eta_s=round(max(total - done, 0) / rate, 1) if total and rate else None)
+            snapshot = dict(self._progress)
+        logger.info(f"Ingest progress: {snapshot['rows_embedded']}/{snapshot['total'] or '?'} menus embedded "
+                    f"({snapshot['rows_per_s']} menus/s, ETA {snapshot['eta_s']} s)")
+        if self.progress_callback:
+            try:
+                self.progress_callback(snapshot)
+            except Exception as e:
+                logger.warning(f"Ingest progress callback failed: {e}")
+
+    def _finish(self, stage: str) -> None:
+        with self._lock:
+            self._progress.update(stage=stage, eta_s=0.0,
+                                  elapsed_s=round(time.perf_counter() - self._start, 2))
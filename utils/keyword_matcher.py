@@ -0,0 +1,103 @@
+import re
+import logging
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class KeywordMatcher:
+    """Finds every FOOD_KEYWORDS subcategory present in a preprocessed text in one regex pass
+
+    Matching keeps the semantics of the original per-keyword checks:
+    - multi-word keywords match when each of their words longer than 2 characters occurs as a substring
+    - single words longer than 3 characters match as substrings
+    - shorter words must be whole words
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, List[str]]]):
+        self._requirements = {}
+        self._always_matched = []
+        self._atom_subcategories = {}
+        substring_atoms = set()
+        self.token_atoms = set()
+
+        for category, subcategories in keywords.items():
+            for subcategory, keyword_list in subcategories.items():
+                key = (category, subcategory)
+                requirements = []
+                for keyword in keyword_list:
+                    requirement = self._keyword_requirement(keyword.lower())
+                    requirements.append(requirement)
+                    if not requirement:
+                        self._always_matched.append(key)
+                    for atom in requirement:
+                        self._atom_subcategories.setdefault(atom, set()).add(key)
+                        if atom[0] == 'substring':
+                            substring_atoms.add(atom[1])
+                        else:
+                            self.token_atoms.add(atom[1])
+                self._requirements[key] = requirements
+
+        self._order = {key: position for position, key in enumerate(self._requirements)}
+        self._pattern = re.compile('(?=(' + self._trie_pattern(self._build_trie(substring_atoms)) + '))') \
+            if substring_atoms else None
+        # Every atom that starts where a longer atom starts is one of its prefixes
+        self._prefix_closure = {
+            atom: frozenset(other for other in substring_atoms if atom.startswith(other))
+            for atom in substring_atoms
+        }
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Matched subcategories per category, in FOOD_KEYWORDS order"""
+        present = self.find_atoms(text)
+
+        candidates = set(self._always_matched)
+        for atom in present:
+            candidates.update(self._atom_subcategories.get(atom, ()))
+
+        features = {}
+        for category, subcategory in sorted(candidates, key=self._order.__getitem__):
+            if any(requirement <= present for requirement in self._requirements[(category, subcategory)]):
+                features.setdefault(category, []).append(subcategory)
+        return features
+
+    def find_atoms(self, text: str) -> Set[Tuple[str, str]]:
+        """Substring and whole-word atoms that occur in the text"""
+        present = set()
+        if self._pattern is not None:
+            for longest in {m.group(1) for m in self._pattern.finditer(text)}:
+                present.update(('substring', atom) for atom in self._prefix_closure[longest])
+
+        # Preprocessed text only holds word characters and single spaces, so \b...\b equals a token match
+        present.update(('token', token) for token in self.token_atoms.intersection(text.split()))
+        return present
+
+    @staticmethod
+    def _keyword_requirement(keyword: str) -> FrozenSet[Tuple[str, str]]:
+        """Atoms that must all be present for the keyword to match"""
+        if ' ' in keyword:
+            return frozenset(('substring', word) for word in keyword.split() if len(word) > 2)
+        if len(keyword) > 3:
+            return frozenset([('substring', keyword)])
+        return frozenset([('token', keyword)])
+
+    @staticmethod
+    def _build_trie(words: Set[str]) -> Dict:
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = True
+        return trie
+
+    @staticmethod
+    def _trie_pattern(node: Dict) -> str:
+        """Regex for a trie; optional groups are greedy so the longest atom wins at each position"""
+        alternatives = [re.escape(char) + KeywordMatcher._trie_pattern(child)
+                        for char, child in sorted(node.items()) if char != '']
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
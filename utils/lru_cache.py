@@ -0,0 +1,112 @@
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _default_sizeof(key: Hashable, value: Any) -> int:
+    """Approximate footprint of a cache entry: array buffers by nbytes, anything else by sys.getsizeof"""
+    return sys.getsizeof(key) + (getattr(value, 'nbytes', None) or sys.getsizeof(value))
+
+class LRUCache:
+    """Size-bounded, thread-safe least-recently-used cache with hit/miss counters and optional TTL
+
+    With maxbytes, entries are also evicted to keep the summed sizeof(key, value) within that budget.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: Optional[float] = None, maxbytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Hashable, Any], int]] = None):
+        self.maxsize = max(int(maxsize), 0)
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof or _default_sizeof
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for key, marking it as recently used"""
+        with self._lock:
+            value = self._lookup(key)
+            return default if value is _MISSING else value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond maxsize"""
+        if self.maxsize == 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self.sizeof(key, value) if self.maxbytes else 0
+        if self.maxbytes and size > self.maxbytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes and self.nbytes > self.maxbytes):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        # Computed outside the lock; concurrent misses on one key just compute it twice
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Value for key or _MISSING, updating recency and counters; caller holds the lock"""
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at, size = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.nbytes -= size
+            self.expirations += 1
+        self.misses += 1
+        return _MISSING
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, hit/miss counters and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'bytes': self.nbytes,
+                'maxbytes': self.maxbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
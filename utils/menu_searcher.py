@@ -1,65 +1,362 @@
+import heapq
 import logging
 import pandas as pd
 import numpy as np
-import re
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional, Tuple
 from config.model_config import SEARCH_CONFIG, SCORING_CONFIG
 from utils.text_processor import TextProcessor
+from utils.vector_scorer import VectorizedScorer
+from utils.lru_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Satisfaction ratios a menu needs to be included in the results
+MULTI_VALUE_SATISFACTION = 0.75
+SINGLE_VALUE_SATISFACTION = 0.3
+
+# Per-query columns attached to candidate rows, kept alongside cached result positions
+QUERY_SCORE_COLUMNS = ('semantic_score', 'tfidf_score')
+
 class MenuSearcher:
     """Fixed menu search with balanced single/multi-value accuracy"""
     
-    def search_menus(self, query: str, available_menus_df: pd.DataFrame) -> List[pd.Series]:
+    def __init__(self, model_manager=None, embedding_service=None):
+        self.model_manager = model_manager
+        self.embedding_service = embedding_service
+        self.result_cache = LRUCache(SEARCH_CONFIG.get('result_cache_size', 512),
+                                     ttl=SEARCH_CONFIG.get('result_cache_ttl', 600))
+        self._result_cache_version = None
+    
+    def search_menus(self, query: str, available_menus_df: pd.DataFrame, catalog=None) -> List[pd.Series]:
         """Fixed search with proper single-value and multi-value handling"""
         try:
             if available_menus_df.empty or not query.strip():
                 return []
                 
-            query_clean = TextProcessor.preprocess_text(query)
-            query_features = TextProcessor.extract_features(query_clean)
+            query_clean = TextProcessor.preprocess_query(query)
+            query_features = TextProcessor.extract_query_features(query_clean)
             
             logger.info(f"Fixed search: '{query}' -> Features: {query_features}")
             
-            filtered_df = self._apply_smart_filtering(query_features, available_menus_df, query_clean)
-            logger.info(f"After smart filtering: {len(filtered_df)} menus remain")
+            cache_key = self._result_cache_key(query_clean, query_features, available_menus_df, catalog)
+            if cache_key is not None:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Result cache hit: '{query_clean}' ({len(cached[0])} menus)")
+                    return self._materialize_results(available_menus_df, cached, catalog)
+            
+            results = self._rank_menus(query, query_clean, query_features, available_menus_df, catalog)
+            
+            if cache_key is not None:
+                self.result_cache.put(cache_key, self._result_entry(results))
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Critical error in fixed search: {e}")
+            return []
+    
+    def _rank_menus(self, query: str, query_clean: str, query_features: Dict,
+                    available_menus_df: pd.DataFrame, catalog) -> List[pd.Series]:
+        """Run the full filter and scoring pipeline and return the best max_results menus"""
+        candidates_df = available_menus_df
+        if SEARCH_CONFIG.get('search_mode', 'hybrid') == 'hybrid':
+            semantic_df = self._get_semantic_candidates(query, available_menus_df, catalog)
+            if semantic_df is not None and not semantic_df.empty:
+                candidates_df = semantic_df
+                logger.info(f"Semantic candidates: {len(candidates_df)} of {len(available_menus_df)} menus")
+        
+        filtered_df = self._apply_smart_filtering(query_features, candidates_df, query_clean)
+        logger.info(f"After smart filtering: {len(filtered_df)} menus remain")
+        
+        if filtered_df.empty:
+            logger.warning("No menus passed smart filtering")
+            filtered_df = candidates_df.copy()
+        
+        query_requirements = self._analyze_query_requirements(query_features)
+        
+        feature_index = getattr(catalog, 'feature_index', None)
+        has_feature_index = feature_index is not None and feature_index.num_menus == len(available_menus_df)
+        text_index = getattr(catalog, 'text_index', None)
+        if text_index is not None and text_index.num_menus != len(available_menus_df):
+            text_index = None
+        if text_index is None:
+            # The text fallbacks read title, ingredients and description directly
+            filtered_df = self._materialize(filtered_df, catalog)
+        
+        if has_feature_index:
+            filtered_df = self._select_candidates(filtered_df, feature_index, query_features,
+                                                  query_requirements, query_clean, text_index)
+            logger.info(f"Inverted index candidates: {len(filtered_df)} menus to score")
+        
+        filtered_df = self._add_tfidf_scores(filtered_df, query_clean, available_menus_df, catalog)
+        
+        if has_feature_index and SEARCH_CONFIG.get('scoring_engine', 'vectorized') == 'vectorized':
+            matches = self._score_vectorized(filtered_df, feature_index, query_features,
+                                             query_requirements, query_clean, text_index, catalog)
+        else:
+            matches = self._score_rows(self._materialize(filtered_df, catalog), query_features,
+                                       query_requirements, query_clean, text_index)
+        
+        matches.sort(key=lambda x: (x[0], x[3]), reverse=True)
+        
+        self._log_detailed_results(query, matches[:SEARCH_CONFIG.get('max_results', 8)])
+        
+        return [match[1] for match in matches[:SEARCH_CONFIG.get('max_results', 8)]]
+    
+    def _result_cache_key(self, query_clean: str, query_features: Dict,
+                          available_menus_df: pd.DataFrame, catalog) -> Optional[Tuple]:
+        """Canonical cache key for a query against the loaded catalog, or None when it can't be cached"""
+        if catalog is None or catalog.menus is not available_menus_df:
+            return None
+        
+        version = catalog.version
+        if version != self._result_cache_version:
+            # A re-ingested catalog makes every cached ranking stale
+            self.result_cache.clear()
+            self._result_cache_version = version
+        
+        frozen_features = tuple(sorted(
+            (category, tuple(sorted(values))) for category, values in query_features.items()
+        ))
+        return (version, SEARCH_CONFIG.get('search_mode', 'hybrid'), query_clean, frozen_features)
+    
+    def _result_entry(self, results: List[pd.Series]) -> Tuple:
+        """Ranked catalog positions of a result list, with the per-query score columns they carried"""
+        positions = tuple(int(menu.name) for menu in results)
+        score_columns = {
+            column: tuple(float(menu[column]) for menu in results)
+            for column in QUERY_SCORE_COLUMNS if results and column in results[0].index
+        }
+        return positions, score_columns
+    
+    def _materialize_results(self, available_menus_df: pd.DataFrame, entry: Tuple, catalog=None) -> List[pd.Series]:
+        """Rebuild result rows from cached catalog positions"""
+        positions, score_columns = entry
+        rows = self._materialize(available_menus_df.iloc[list(positions)], catalog)
+        if score_columns:
+            rows = rows.assign(**{column: list(values) for column, values in score_columns.items()})
+        return [menu for _, menu in rows.iterrows()]
+    
+    def _materialize(self, menus_df: pd.DataFrame, catalog) -> pd.DataFrame:
+        """Decode the lazily stored text and feature columns of these rows, if the catalog keeps any"""
+        if catalog is None or getattr(catalog, 'store', None) is None:
+            return menus_df
+        return catalog.materialize(menus_df)
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters of the search result cache"""
+        return self.result_cache.stats()
+    
+    def _score_rows(self, filtered_df: pd.DataFrame, query_features: Dict,
+                    query_requirements: Dict, query_clean: str, text_index=None) -> List:
+        """Score menus one row at a time, keeping only the best max_results in a bounded heap"""
+        max_results = SEARCH_CONFIG.get('max_results', 8)
+        if filtered_df.empty or max_results <= 0:
+            return []
+        
+        if text_index is not None:
+            relevance = text_index.relevance(query_clean, filtered_df.index.to_numpy())
+        else:
+            relevance = VectorizedScorer.text_relevance(filtered_df, query_clean)
+        
+        # Scan the most promising menus first so the scan can stop once no bound beats the k-th score
+        bounds = self._score_upper_bounds(filtered_df, relevance, query_features)
+        scan_order = np.argsort(-bounds, kind='stable') if bounds is not None else range(len(filtered_df))
+        
+        best = []
+        for scanned, row in enumerate(scan_order):
+            if bounds is not None and len(best) == max_results and bounds[row] < best[0][0][0]:
+                logger.info(f"Top-{max_results} settled after scoring {scanned} of {len(filtered_df)} menus")
+                break
             
+            menu = filtered_df.iloc[row]
+            try:
+                score_data = self._calculate_balanced_score(
+                    menu, query_features, query_requirements, query_clean,
+                    text_relevance=float(relevance[row])
+                )
+                
+                if score_data['should_include']:
+                    final_score = self._blend_scores(score_data['total_score'], menu.get('semantic_score'),
+                                                     menu.get('tfidf_score'))
+                    # Ties go to the earlier candidate, as in a stable sort
+                    key = (final_score, score_data['relevance_score'], -int(row))
+                    entry = (key, (
+                        final_score,
+                        menu,
+                        score_data['satisfaction_ratio'],
+                        score_data['relevance_score'],
+                        score_data['match_details']
+                    ))
+                    if len(best) < max_results:
+                        heapq.heappush(best, entry)
+                    elif key > best[0][0]:
+                        heapq.heapreplace(best, entry)
+                    
+            except Exception as e:
+                logger.error(f"Error processing menu {menu.get('title', 'Unknown')}: {e}")
+                continue
+        
+        return [match for _, match in sorted(best, key=lambda entry: entry[0], reverse=True)]
+    
+    def _score_upper_bounds(self, filtered_df: pd.DataFrame, relevance: np.ndarray,
+                            query_features: Dict) -> Optional[np.ndarray]:
+        """Per-menu upper bound of the final score, or None when the weights don't allow one"""
+        keyword_weight = SEARCH_CONFIG.get('keyword_weight', 0.6)
+        semantic_weight = SEARCH_CONFIG.get('semantic_weight', 0.4)
+        tfidf_weight = SEARCH_CONFIG.get('tfidf_weight', 0.0)
+        if min(keyword_weight, semantic_weight, tfidf_weight) < 0:
+            return None
+        
+        bounds = relevance + VectorizedScorer.max_feature_score(query_features)
+        if 'semantic_score' in filtered_df.columns:
+            semantic = filtered_df['semantic_score'].to_numpy(dtype=np.float64)
+            blended = (keyword_weight * bounds +
+                       semantic_weight * semantic * SEARCH_CONFIG.get('semantic_score_scale', 100))
+            bounds = np.where(np.isnan(semantic), bounds, blended)
+        if 'tfidf_score' in filtered_df.columns:
+            tfidf = np.nan_to_num(filtered_df['tfidf_score'].to_numpy(dtype=np.float64))
+            bounds = bounds + tfidf_weight * SEARCH_CONFIG.get('tfidf_score_scale', 100) * tfidf
+        return bounds
+    
+    def _score_vectorized(self, filtered_df: pd.DataFrame, feature_index, query_features: Dict,
+                          query_requirements: Dict, query_clean: str, text_index=None, catalog=None) -> List:
+        """Score all candidates with array operations, materializing only the best max_results rows"""
+        try:
             if filtered_df.empty:
-                logger.warning("No menus passed smart filtering")
-                filtered_df = available_menus_df.copy()
+                return []
+            
+            scores = VectorizedScorer.score(
+                filtered_df, feature_index, query_features, query_requirements, query_clean,
+                MULTI_VALUE_SATISFACTION, SINGLE_VALUE_SATISFACTION, text_index=text_index
+            )
+            
+            final_score = scores['total_score']
+            if 'semantic_score' in filtered_df.columns:
+                semantic = filtered_df['semantic_score'].to_numpy(dtype=np.float64)
+                blended = (SEARCH_CONFIG.get('keyword_weight', 0.6) * final_score +
+                           SEARCH_CONFIG.get('semantic_weight', 0.4) *
+                           (semantic * SEARCH_CONFIG.get('semantic_score_scale', 100)))
+                final_score = np.where(np.isnan(semantic), final_score, blended)
+            
+            if 'tfidf_score' in filtered_df.columns:
+                final_score = final_score + (SEARCH_CONFIG.get('tfidf_weight', 0.0) *
+                                             SEARCH_CONFIG.get('tfidf_score_scale', 100) *
+                                             filtered_df['tfidf_score'].to_numpy(dtype=np.float64))
+            
+            max_results = SEARCH_CONFIG.get('max_results', 8)
+            included = np.flatnonzero(scores['should_include'])
+            if max_results <= 0:
+                return []
+            if len(included) > max_results:
+                # Only menus scoring at least the k-th best score can make the top k
+                split = len(included) - max_results
+                kth_score = np.partition(final_score[included], split)[split]
+                included = included[final_score[included] >= kth_score]
             
+            # Highest score first, then relevance, then candidate order (same as a stable sort)
+            order = np.lexsort((included, -scores['relevance_score'][included], -final_score[included]))
+            best = included[order[:max_results]]
+            
+            best_df = self._materialize(filtered_df.iloc[best], catalog)
             matches = []
-            query_requirements = self._analyze_query_requirements(query_features)
+            for i, row in enumerate(best):
+                menu = best_df.iloc[i]
+                matches.append((
+                    float(final_score[row]),
+                    menu,
+                    float(scores['satisfaction_ratio'][row]),
+                    float(scores['relevance_score'][row]),
+                    self._build_match_details(TextProcessor.get_menu_features(menu), query_features)
+                ))
+            return matches
             
-            for idx, menu in filtered_df.iterrows():
-                try:
-                    score_data = self._calculate_balanced_score(
-                        menu, query_features, query_requirements, query_clean
-                    )
-                    
-                    if score_data['should_include']:
-                        matches.append((
-                            score_data['total_score'],
-                            menu,
-                            score_data['satisfaction_ratio'],
-                            score_data['relevance_score'],
-                            score_data['match_details']
-                        ))
-                        
-                except Exception as e:
-                    logger.error(f"Error processing menu {menu.get('title', 'Unknown')}: {e}")
-                    continue
+        except Exception as e:
+            logger.error(f"Error in vectorized scoring, falling back to row scoring: {e}")
+            return self._score_rows(self._materialize(filtered_df, catalog), query_features,
+                                    query_requirements, query_clean, text_index)
+    
+    def _build_match_details(self, menu_features: Dict, query_features: Dict) -> Dict:
+        """Per-category required/found/matched values for result logging"""
+        match_details = {}
+        for feature_type, required_values in query_features.items():
+            if not required_values:
+                continue
+            menu_values = set(menu_features.get(feature_type, []))
+            matched_values = set(required_values).intersection(menu_values)
+            match_details[feature_type] = {
+                'required': list(required_values),
+                'found': list(menu_values),
+                'matched': list(matched_values),
+                'match_ratio': len(matched_values) / len(required_values) if required_values else 0
+            }
+        return match_details
+    
+    def _get_semantic_candidates(self, query: str, available_menus_df: pd.DataFrame, catalog) -> Optional[pd.DataFrame]:
+        """Top-k FAISS neighbours of the query, with their similarity as 'semantic_score'"""
+        try:
+            faiss_index = getattr(catalog, 'faiss_index', None)
+            if faiss_index is None or not self.model_manager:
+                return None
             
-            matches.sort(key=lambda x: (x[0], x[3]), reverse=True)
+            if faiss_index.ntotal != len(available_menus_df):
+                logger.warning(f"FAISS index size {faiss_index.ntotal} does not match catalog size {len(available_menus_df)}")
+                return None
             
-            self._log_detailed_results(query, matches[:SEARCH_CONFIG.get('max_results', 8)])
+            if self.embedding_service is not None:
+                query_embedding = self.embedding_service.embed(query)
+            else:
+                query_embedding = self.model_manager.embed_texts([query])
+            if query_embedding.size == 0:
+                return None
+            
+            top_k = min(SEARCH_CONFIG.get('semantic_top_k', 50), faiss_index.ntotal)
+            similarities, labels = faiss_index.search(query_embedding, top_k)
+            similarities, positions = similarities[0], catalog.label_positions(labels[0])
+            
+            keep = (positions >= 0) & (similarities >= SEARCH_CONFIG.get('similarity_threshold', 0.3))
+            if not keep.any():
+                logger.info("No semantic candidates above similarity threshold, using keyword search")
+                return None
             
-            return [match[1] for match in matches[:SEARCH_CONFIG.get('max_results', 8)]]
+            candidates_df = available_menus_df.iloc[positions[keep]].copy()
+            candidates_df['semantic_score'] = similarities[keep]
+            return candidates_df
             
         except Exception as e:
-            logger.error(f"Critical error in fixed search: {e}")
-            return []
+            logger.error(f"Error getting semantic candidates: {e}")
+            return None
+    
+    def _blend_scores(self, keyword_score: float, semantic_score: Optional[float],
+                      tfidf_score: Optional[float] = None) -> float:
+        """Blend keyword, semantic and TF-IDF scores with the configured weights"""
+        score = keyword_score
+        if semantic_score is not None and not pd.isna(semantic_score):
+            semantic_points = float(semantic_score) * SEARCH_CONFIG.get('semantic_score_scale', 100)
+            score = (SEARCH_CONFIG.get('keyword_weight', 0.6) * keyword_score +
+                     SEARCH_CONFIG.get('semantic_weight', 0.4) * semantic_points)
+        
+        if tfidf_score is not None and not pd.isna(tfidf_score):
+            score += (SEARCH_CONFIG.get('tfidf_weight', 0.0) *
+                      SEARCH_CONFIG.get('tfidf_score_scale', 100) * float(tfidf_score))
+        return score
+    
+    def _add_tfidf_scores(self, filtered_df: pd.DataFrame, query_clean: str,
+                          available_menus_df: pd.DataFrame, catalog) -> pd.DataFrame:
+        """Attach the TF-IDF cosine similarity of each candidate as 'tfidf_score' when that signal is enabled"""
+        try:
+            tfidf_index = getattr(catalog, 'tfidf_index', None)
+            if (SEARCH_CONFIG.get('tfidf_weight', 0.0) <= 0 or tfidf_index is None or filtered_df.empty
+                    or tfidf_index.num_menus != len(available_menus_df)):
+                return filtered_df
+            
+            scores = tfidf_index.scores(query_clean, filtered_df.index.to_numpy())
+            return filtered_df.assign(tfidf_score=scores)
+            
+        except Exception as e:
+            logger.error(f"Error computing TF-IDF scores: {e}")
+            return filtered_df
     
     def _apply_smart_filtering(self, query_features: Dict, available_menus_df: pd.DataFrame, query_clean: str) -> pd.DataFrame:
         """Smart filtering that's less aggressive for single-value queries"""
@@ -84,7 +381,8 @@ class MenuSearcher:
             return available_menus_df
     
     def _calculate_balanced_score(self, menu: pd.Series, query_features: Dict, 
-                                 query_requirements: Dict, query_clean: str) -> Dict:
+                                 query_requirements: Dict, query_clean: str,
+                                 text_relevance: Optional[float] = None) -> Dict:
         """Balanced scoring that works well for both single and multi-value queries"""
         try:
             score_data = {
@@ -100,16 +398,19 @@ class MenuSearcher:
             title = str(menu.get('title', ''))
             ingredients = str(menu.get('ingredients', ''))
             description = str(menu.get('description', ''))
-            menu_text = f"{title} {ingredients} {description}".lower()
             
-            menu_features = TextProcessor.extract_features(menu_text)
+            menu_features = TextProcessor.get_menu_features(menu)
             
-            text_relevance_score = self._calculate_text_relevance(query_clean, title, ingredients, description)
+            if text_relevance is None:
+                text_relevance_score = self._calculate_text_relevance(query_clean, title, ingredients, description)
+            else:
+                text_relevance_score = text_relevance
             score_data['relevance_score'] = text_relevance_score
             score_data['total_score'] += text_relevance_score
             
             feature_score = 0
             categories_satisfied = 0
+            missed_category = False
             
             for feature_type, required_values in query_features.items():
                 if not required_values:
@@ -119,13 +420,6 @@ class MenuSearcher:
                 required_set = set(required_values)
                 matched_values = required_set.intersection(menu_values)
                 
-                score_data['match_details'][feature_type] = {
-                    'required': list(required_values),
-                    'found': list(menu_values),
-                    'matched': list(matched_values),
-                    'match_ratio': len(matched_values) / len(required_values) if required_values else 0
-                }
-                
                 if matched_values:
                     score_data['requirements_met'] += len(matched_values)
                     
@@ -162,9 +456,11 @@ class MenuSearcher:
                     categories_satisfied += 1
                 
                 elif query_requirements['is_multi_value']:
-                    feature_score -= SCORING_CONFIG['missing_value_penalty'] * len(required_values - matched_values)
+                    feature_score -= SCORING_CONFIG['missing_value_penalty'] * len(required_set - matched_values)
+                    missed_category = True
             
             score_data['total_score'] += feature_score
+            score_data['match_details'] = self._build_match_details(menu_features, query_features)
             
             if score_data['total_requirements'] > 0:
                 score_data['satisfaction_ratio'] = score_data['requirements_met'] / score_data['total_requirements']
@@ -177,14 +473,15 @@ class MenuSearcher:
             min_threshold = SEARCH_CONFIG.get('min_score_threshold', 30)
             
             if query_requirements['is_multi_value'] or query_requirements['is_multi_category']:
-                required_satisfaction = 0.75  
+                # Multi-value queries never include a menu that leaves a requested category unmatched
                 score_data['should_include'] = (
-                    score_data['satisfaction_ratio'] >= required_satisfaction and
+                    not missed_category and
+                    score_data['satisfaction_ratio'] >= MULTI_VALUE_SATISFACTION and
                     score_data['total_score'] >= min_threshold
                 )
             else:
                 score_data['should_include'] = (
-                    (score_data['satisfaction_ratio'] >= 0.3 or score_data['relevance_score'] >= 40) and
+                    (score_data['satisfaction_ratio'] >= SINGLE_VALUE_SATISFACTION or score_data['relevance_score'] >= 40) and
                     score_data['total_score'] >= (min_threshold * 0.7)  
                 )
             
@@ -198,6 +495,46 @@ class MenuSearcher:
                 'should_include': False, 'match_details': {}
             }
     
+    def _select_candidates(self, filtered_df: pd.DataFrame, feature_index, query_features: Dict,
+                           query_requirements: Dict, query_clean: str, text_index=None) -> pd.DataFrame:
+        """Keep only menus that can pass should_include, using the feature posting lists"""
+        try:
+            positions = filtered_df.index.to_numpy()
+            total_values = query_requirements['total_values']
+            is_strict = query_requirements['is_multi_value'] or query_requirements['is_multi_category']
+            keep = np.zeros(len(positions), dtype=bool)
+            
+            if total_values > 0:
+                counts = feature_index.match_counts(query_features)[positions]
+                required_ratio = MULTI_VALUE_SATISFACTION if is_strict else SINGLE_VALUE_SATISFACTION
+                keep |= (counts / total_values) >= required_ratio
+            
+            # Without feature requirements (or for single-value queries) text relevance alone can qualify a menu
+            if total_values == 0 or not is_strict:
+                keep |= self._text_hit_mask(filtered_df, query_clean, text_index)
+            
+            return filtered_df[keep]
+            
+        except Exception as e:
+            logger.error(f"Error selecting candidates from feature index: {e}")
+            return filtered_df
+    
+    def _text_hit_mask(self, menus_df: pd.DataFrame, query_clean: str, text_index=None) -> np.ndarray:
+        """Menus whose title, ingredients or description contain a query word"""
+        if text_index is not None:
+            return text_index.hit_mask(query_clean, menus_df.index.to_numpy())
+        
+        mask = np.zeros(len(menus_df), dtype=bool)
+        query_words = [word for word in query_clean.lower().split() if len(word) > 2]
+        if not query_words:
+            return mask
+        
+        menu_text = (menus_df['title'].astype(str) + ' ' + menus_df['ingredients'].astype(str) + ' ' +
+                     menus_df['description'].astype(str)).str.lower()
+        for word in query_words:
+            mask |= menu_text.str.contains(word, regex=False).to_numpy()
+        return mask
+    
     def _calculate_text_relevance(self, query_clean: str, title: str, ingredients: str, description: str) -> float:
         """Calculate direct text relevance score"""
         try:
@@ -247,46 +584,11 @@ class MenuSearcher:
     def _filter_seafood_menus_enhanced(self, available_menus_df: pd.DataFrame) -> pd.DataFrame:
         """Enhanced seafood filtering with comprehensive patterns"""
         try:
-            seafood_indicators = [
-                r'\bikan\b', r'\bfish\b', r'\bseafood\b',
-                r'\budang\b', r'\bshrimp\b', r'\bprawn\b',
-                r'\bcumi\b', r'\bsquid\b', r'\bsotong\b',
-                r'\bkepiting\b', r'\bcrab\b', r'\brajungan\b',
-                r'\bkerang\b', r'\bmussel\b', r'\bclam\b',
-                r'\blobster\b', r'\bmakanan\s+laut\b',
-                
-                r'\bsalmon\b', r'\btuna\b', r'\bkakap\b', r'\bgurame\b',
-                r'\blele\b', r'\bnila\b', r'\bbandeng\b', r'\btenggiri\b',
-                r'\bmujair\b', r'\bpatin\b', r'\bbawal\b', r'\bdori\b'
-            ]
-            
-            exclusion_patterns = [
-                r'\bayam\b', r'\bchicken\b', r'\bsapi\b', r'\bbeef\b',
-                r'\bkambing\b', r'\bgoat\b', r'\bbebek\b', r'\bduck\b',
-                r'\btelur\b', r'\begg\b', r'\btahu\b', r'\btempe\b'
-            ]
-            
-            seafood_menus = []
-            
-            for idx, menu in available_menus_df.iterrows():
-                try:
-                    full_text = f"{menu.get('title', '')} {menu.get('ingredients', '')} {menu.get('description', '')}".lower()
-                    
-                    has_seafood = any(re.search(pattern, full_text, re.IGNORECASE) 
-                                    for pattern in seafood_indicators)
-                    has_exclusion = any(re.search(pattern, full_text, re.IGNORECASE) 
-                                      for pattern in exclusion_patterns)
-                    
-                    if has_seafood and not has_exclusion:
-                        seafood_menus.append(menu)
-                    
-                except Exception as e:
-                    logger.debug(f"Error processing seafood menu: {e}")
-                    continue
+            seafood_df = available_menus_df[self._dietary_mask(available_menus_df, 'is_seafood')]
             
-            if seafood_menus:
-                logger.info(f"Enhanced seafood filtering: {len(seafood_menus)} seafood menus found")
-                return pd.DataFrame(seafood_menus).reset_index(drop=True)
+            if not seafood_df.empty:
+                logger.info(f"Enhanced seafood filtering: {len(seafood_df)} seafood menus found")
+                return seafood_df
             else:
                 logger.warning("No seafood menus found")
                 return pd.DataFrame()
@@ -298,39 +600,11 @@ class MenuSearcher:
     def _filter_vegetarian_menus(self, available_menus_df: pd.DataFrame) -> pd.DataFrame:
         """Enhanced vegetarian filtering"""
         try:
-            vegetarian_indicators = [
-                r'\btahu\b', r'\btofu\b', r'\btempe\b', r'\btempeh\b',
-                r'\bvegetarian\b', r'\bvegan\b', r'\bnabati\b',
-                r'\bsayur\b', r'\bjamur\b', r'\bmushroom\b'
-            ]
-            
-            animal_exclusions = [
-                r'\bayam\b', r'\bchicken\b', r'\bikan\b', r'\bfish\b',
-                r'\bsapi\b', r'\bbeef\b', r'\budang\b', r'\bshrimp\b',
-                r'\bcumi\b', r'\bsquid\b', r'\bdaging\b', r'\bmeat\b'
-            ]
-            
-            vegetarian_menus = []
-            
-            for idx, menu in available_menus_df.iterrows():
-                try:
-                    full_text = f"{menu.get('title', '')} {menu.get('ingredients', '')} {menu.get('description', '')}".lower()
-                    
-                    has_vegetarian = any(re.search(pattern, full_text, re.IGNORECASE) 
-                                       for pattern in vegetarian_indicators)
-                    has_animal = any(re.search(pattern, full_text, re.IGNORECASE) 
-                                   for pattern in animal_exclusions)
-                    
-                    if has_vegetarian and not has_animal:
-                        vegetarian_menus.append(menu)
-                        
-                except Exception as e:
-                    logger.debug(f"Error processing vegetarian menu: {e}")
-                    continue
+            vegetarian_df = available_menus_df[self._dietary_mask(available_menus_df, 'is_vegetarian')]
             
-            if vegetarian_menus:
-                logger.info(f"Vegetarian filtering: {len(vegetarian_menus)} vegetarian menus found")
-                return pd.DataFrame(vegetarian_menus).reset_index(drop=True)
+            if not vegetarian_df.empty:
+                logger.info(f"Vegetarian filtering: {len(vegetarian_df)} vegetarian menus found")
+                return vegetarian_df
             
             return pd.DataFrame()
             
@@ -338,6 +612,15 @@ class MenuSearcher:
             logger.error(f"Error in vegetarian filtering: {e}")
             return available_menus_df
     
+    def _dietary_mask(self, menus_df: pd.DataFrame, column: str) -> np.ndarray:
+        """Boolean dietary column stored at ingest, classified on the fly for catalogs without it"""
+        if column in menus_df.columns:
+            return menus_df[column].to_numpy(dtype=bool)
+        return np.array([
+            TextProcessor.extract_dietary_flags(TextProcessor.build_menu_text(menu))[column]
+            for _, menu in menus_df.iterrows()
+        ], dtype=bool)
+    
     def _is_strict_vegetarian_query(self, query_features: Dict) -> bool:
         """Strict vegetarian detection"""
         try:
@@ -1,38 +1,109 @@
+import os
+import time
 import logging
+import threading
 import numpy as np
 import pandas as pd
-import faiss
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
 from config.model_config import MODEL_CONFIG
 from utils.text_processor import TextProcessor
+from utils.embedding_cache import EmbeddingCache
+from utils.lru_cache import LRUCache
+from utils.embedding_backends import BACKENDS, ONNX_BACKENDS, EmbeddingBackends
 
 logger = logging.getLogger(__name__)
 
 class ModelManager:
     """Enhanced AI model operations with fallback and error handling"""
     
-    def __init__(self):
+    def __init__(self, lazy: Optional[bool] = None):
         self.model = None
         self.model_name = None
         self.embed_dim = None
-        self.load_model()
+        self.model_source = None
+        self.embedding_backend = None
+        self.backend_info = {}
+        self.load_timings = {}
+        self.last_embed_stats = {}
+        # Query text -> float16 embedding, bounded by entry count and by bytes
+        self.query_cache = LRUCache(MODEL_CONFIG.get('query_embedding_cache_size', 10000),
+                                    maxbytes=MODEL_CONFIG.get('query_embedding_cache_bytes', 8 * 1024 * 1024))
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        
+        if lazy is None:
+            lazy = MODEL_CONFIG.get('lazy_load', True)
+        if not lazy:
+            self.load_model()
+    
+    def ensure_loaded(self) -> bool:
+        """Load the model on first use; concurrent callers wait for the same load"""
+        if self.model is not None:
+            return True
+        with self._lock:
+            if self.model is None:
+                self.load_model()
+        return self.model is not None
+    
+    def warm_up(self, background: bool = True) -> None:
+        """Load the model ahead of the first request, optionally on a daemon thread"""
+        if self.model is not None or (self._warmup_thread is not None and self._warmup_thread.is_alive()):
+            return
+        if not background:
+            self.ensure_loaded()
+            return
+        
+        def _warm_up():
+            try:
+                self.ensure_loaded()
+            except Exception as e:
+                logger.error(f"Background model warm-up failed: {e}")
+        
+        self._warmup_thread = threading.Thread(target=_warm_up, name="model-warmup", daemon=True)
+        self._warmup_thread.start()
+    
+    def snapshot_path(self, model_name: str) -> str:
+        """Directory of the pinned local copy of a model"""
+        return os.path.join(MODEL_CONFIG['models_dir'], MODEL_CONFIG.get('snapshot_dir', 'embedding_models'),
+                            model_name.replace('/', '__'))
     
     def load_model(self):
         """Load sentence transformer model with enhanced fallback"""
-        try:
-            self.model = SentenceTransformer(MODEL_CONFIG['primary_model'])
-            self.model_name = MODEL_CONFIG['primary_model']
-            logger.info(f"Loaded primary model: {MODEL_CONFIG['primary_model']}")
-        except Exception as e:
-            logger.warning(f"Failed to load primary model, using backup: {e}")
+        start = time.perf_counter()
+        if MODEL_CONFIG.get('offline', False):
+            # Must be set before the hub libraries are imported
+            os.environ.setdefault('HF_HUB_OFFLINE', '1')
+            os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+        
+        backend = MODEL_CONFIG.get('embedding_backend', 'torch')
+        if backend not in BACKENDS:
+            logger.warning(f"Unknown embedding backend '{backend}', using torch")
+            backend = 'torch'
+        
+        if backend in ONNX_BACKENDS and self._load_exported_backend(backend):
+            import_done = time.perf_counter()
+        else:
+            from sentence_transformers import SentenceTransformer
+            import_done = time.perf_counter()
+            
             try:
-                self.model = SentenceTransformer(MODEL_CONFIG['backup_model'])
-                self.model_name = MODEL_CONFIG['backup_model']
-                logger.info(f"Loaded backup model: {MODEL_CONFIG['backup_model']}")
-            except Exception as e2:
-                logger.error(f"Failed to load backup model: {e2}")
-                raise Exception("Could not load any sentence transformer model")
+                self.model, self.model_source = self._load_named_model(SentenceTransformer, MODEL_CONFIG['primary_model'])
+                self.model_name = MODEL_CONFIG['primary_model']
+                logger.info(f"Loaded primary model: {MODEL_CONFIG['primary_model']} ({self.model_source})")
+            except Exception as e:
+                logger.warning(f"Failed to load primary model, using backup: {e}")
+                try:
+                    self.model, self.model_source = self._load_named_model(SentenceTransformer, MODEL_CONFIG['backup_model'])
+                    self.model_name = MODEL_CONFIG['backup_model']
+                    logger.info(f"Loaded backup model: {MODEL_CONFIG['backup_model']} ({self.model_source})")
+                except Exception as e2:
+                    logger.error(f"Failed to load backup model: {e2}")
+                    raise Exception("Could not load any sentence transformer model")
+            
+            self.embedding_backend = 'torch'
+            self.backend_info = {}
+            if backend != 'torch':
+                self._switch_backend(backend)
         
         # Get embedding dimension
         try:
@@ -41,44 +112,238 @@ class ModelManager:
         except Exception as e:
             logger.error(f"Error getting embedding dimension: {e}")
             self.embed_dim = 384  # Default dimension
+        
+        load_done = time.perf_counter()
+        self.load_timings = {
+            'import_ms': round((import_done - start) * 1000, 2),
+            'load_ms': round((load_done - import_done) * 1000, 2),
+            'total_ms': round((load_done - start) * 1000, 2),
+            'source': self.model_source,
+            'backend': self.embedding_backend
+        }
+        logger.info(f"Model ready in {self.load_timings['total_ms']} ms "
+                    f"(import {self.load_timings['import_ms']} ms, load {self.load_timings['load_ms']} ms)")
+    
+    def _load_exported_backend(self, backend: str) -> bool:
+        """Serve the primary model from its accepted ONNX export, skipping the torch import entirely"""
+        try:
+            encoder, info = EmbeddingBackends.load_exported(MODEL_CONFIG['primary_model'], backend)
+        except Exception as e:
+            logger.warning(f"Could not load exported {backend} backend: {e}")
+            return False
+        if encoder is None:
+            return False
+        self.model = encoder
+        self.model_name = MODEL_CONFIG['primary_model']
+        self.model_source = 'export'
+        self.embedding_backend = backend
+        self.backend_info = info
+        logger.info(f"Loaded {backend} export of {self.model_name} (drift {info.get('drift')})")
+        return True
+    
+    def _switch_backend(self, backend: str) -> None:
+        """Replace the loaded reference model by a CPU inference backend if its drift is acceptable"""
+        if backend in ONNX_BACKENDS:
+            info = EmbeddingBackends.read_info(EmbeddingBackends.export_path(self.model_name, backend))
+            if info and not info.get('accepted'):
+                logger.warning(f"Existing {backend} export of {self.model_name} drifts too far "
+                               f"({info.get('drift')}), staying on torch")
+                self.backend_info = info
+                return
+        try:
+            encoder, info = EmbeddingBackends.build(self.model, self.model_name, backend)
+        except Exception as e:
+            logger.warning(f"Could not build {backend} embedding backend, staying on torch: {e}")
+            return
+        self.backend_info = info
+        if encoder is None:
+            logger.warning(f"{backend} embedding backend drifts too far from the reference ({info['drift']}), "
+                           f"staying on torch")
+            return
+        self.model = encoder
+        self.embedding_backend = backend
+        logger.info(f"Using {backend} embedding backend (drift {info['drift']})")
+    
+    def embedding_key(self) -> str:
+        """Cache namespace of the embeddings produced: the model name, qualified by a non-reference backend"""
+        if self.embedding_backend in (None, 'torch'):
+            return self.model_name
+        return f"{self.model_name}@{self.embedding_backend}"
+    
+    def _load_named_model(self, model_class, model_name: str):
+        """Load a model from its pinned snapshot if present, otherwise from the hub cache (pinning it)"""
+        path = self.snapshot_path(model_name)
+        if os.path.isdir(path):
+            return model_class(path, device=MODEL_CONFIG.get('device')), 'snapshot'
+        
+        if MODEL_CONFIG.get('offline', False):
+            logger.info(f"No snapshot at {path}, trying the local hub cache for {model_name}")
+        model = model_class(model_name, device=MODEL_CONFIG.get('device'))
+        
+        if MODEL_CONFIG.get('save_snapshot', True):
+            try:
+                model.save(path)
+                logger.info(f"Pinned model snapshot to {path}")
+            except Exception as e:
+                logger.warning(f"Could not save model snapshot: {e}")
+        return model, 'hub'
     
-    def embed_texts(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings with enhanced preprocessing and error handling"""
+    def embedding_cache_path(self) -> str:
+        """File of the persistent embedding cache for the loaded model"""
+        return os.path.join(MODEL_CONFIG['models_dir'], MODEL_CONFIG.get('embedding_cache_dir', 'embedding_cache'),
+                            f"{(self.model_name or 'unknown').replace('/', '__')}.npz")
+
+    def embed_texts(self, texts: List[str], use_cache: bool = False, evict_orphans: bool = False,
+                    cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+        """Generate embeddings with enhanced preprocessing and error handling
+
+        With use_cache, only texts missing from the on-disk embedding cache are encoded; evict_orphans
+        additionally drops cached entries for texts not in this call (pass it when embedding the full catalog).
+        A cache from open_embedding_cache() is used as is and left for close_embedding_cache() to save.
+        """
         if not texts:
             logger.warning("No texts provided for embedding")
             return np.array([])
         
         try:
-            processed_texts = []
-            for text in texts:
-                try:
-                    if text and pd.notna(text):
-                        clean_text = TextProcessor.preprocess_text(str(text))
-                        expanded_text = TextProcessor.expand_with_synonyms(clean_text)
-                        if expanded_text and expanded_text.strip():
-                            processed_texts.append(expanded_text)
-                        else:
-                            processed_texts.append("makanan") 
-                    else:
-                        processed_texts.append("makanan")  
-                except Exception as e:
-                    logger.warning(f"Error preprocessing text: {e}")
-                    processed_texts.append("makanan") 
+            self.ensure_loaded()
+            
+            processed_texts = self._preprocess_texts(texts)
             
             if not processed_texts:
                 logger.warning("No valid texts after preprocessing")
                 return np.array([])
             
-            # Generate embeddings with normalization
-            embeddings = self.model.encode(processed_texts, convert_to_numpy=True).astype(np.float32)
-            faiss.normalize_L2(embeddings)
-            
+            if use_cache and MODEL_CONFIG.get('embedding_cache', True):
+                return self._embed_with_cache(processed_texts, evict_orphans, cache)
+            if not use_cache and self.query_cache.maxsize:
+                return self._embed_queries(processed_texts)
+
+            embeddings = self._encode(processed_texts)
             logger.info(f"Generated enhanced embeddings for {len(processed_texts)} texts")
             return embeddings
-            
+
         except Exception as e:
             logger.error(f"Error embedding texts: {e}")
             return np.array([])
+
+    @staticmethod
+    def _preprocess_texts(texts: List[str]) -> List[str]:
+        """Clean and synonym-expand texts for encoding, falling back to a generic text"""
+        processed_texts = []
+        for text in texts:
+            try:
+                if text and pd.notna(text):
+                    clean_text = TextProcessor.preprocess_text(str(text))
+                    expanded_text = TextProcessor.expand_with_synonyms(clean_text)
+                    if expanded_text and expanded_text.strip():
+                        processed_texts.append(expanded_text)
+                    else:
+                        processed_texts.append("makanan") 
+                else:
+                    processed_texts.append("makanan")  
+            except Exception as e:
+                logger.warning(f"Error preprocessing text: {e}")
+                processed_texts.append("makanan") 
+        return processed_texts
+
+    def embedding_cache_keys(self, texts: List[str]) -> List[str]:
+        """Embedding cache keys of texts under the loaded model, as embed_texts(use_cache=True) derives them"""
+        namespace = self.embedding_key()
+        return [EmbeddingCache.make_key(namespace, text) for text in self._preprocess_texts(texts)]
+
+    def _encode(self, processed_texts: List[str]) -> np.ndarray:
+        """Encode preprocessed texts into L2-normalized float32 embeddings"""
+        import faiss
+        embeddings = self.model.encode(processed_texts, batch_size=MODEL_CONFIG.get('batch_size', 32),
+                                       convert_to_numpy=True).astype(np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+    def _embed_queries(self, processed_texts: List[str]) -> np.ndarray:
+        """Query embeddings through the float16 LRU cache, encoding only the texts it lacks
+
+        Fresh embeddings are rounded through float16 as well, so a query embeds identically on hit and miss.
+        """
+        import faiss
+        namespace = self.embedding_key()
+        vectors = [self.query_cache.get((namespace, text)) for text in processed_texts]
+        missing = {}
+        for row, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(processed_texts[row], []).append(row)
+        
+        if missing:
+            encoded = self._encode(list(missing)).astype(np.float16)
+            for (text, rows), vector in zip(missing.items(), encoded):
+                # Copy the row so the cache does not keep the whole batch buffer alive
+                vector = vector.copy()
+                self.query_cache.put((namespace, text), vector)
+                for row in rows:
+                    vectors[row] = vector
+        
+        embeddings = np.vstack(vectors).astype(np.float32)
+        faiss.normalize_L2(embeddings)
+        logger.info(f"Embedded {len(processed_texts)} queries, "
+                    f"{len(processed_texts) - sum(map(len, missing.values()))} from the query cache")
+        return embeddings
+
+    def open_embedding_cache(self) -> EmbeddingCache:
+        """Embedding cache shared by the chunked embed_texts calls of one ingest"""
+        self.ensure_loaded()
+        return EmbeddingCache.load(self.embedding_cache_path(), self.embed_dim)
+
+    def close_embedding_cache(self, cache: EmbeddingCache, evict_orphans: bool = False) -> int:
+        """Save a shared cache, first evicting entries no call asked for if evict_orphans; returns the evicted count"""
+        evicted = cache.retain(cache.seen) if evict_orphans else 0
+        if cache.dirty:
+            try:
+                cache.save()
+            except Exception as e:
+                logger.warning(f"Could not save embedding cache: {e}")
+        return evicted
+
+    def _embed_with_cache(self, processed_texts: List[str], evict_orphans: bool,
+                          shared_cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+        """Reuse cached embeddings keyed by (model, processed text) and encode only the rest"""
+        start = time.perf_counter()
+        cache = shared_cache
+        if cache is None:
+            cache = EmbeddingCache.load(self.embedding_cache_path(), self.embed_dim)
+        keys = [EmbeddingCache.make_key(self.embedding_key(), text) for text in processed_texts]
+        embeddings, missing = cache.lookup(keys)
+
+        encoded = 0
+        if missing:
+            # Identical texts share a key, so each distinct missing text is encoded once
+            first_position = {}
+            for position in missing:
+                first_position.setdefault(keys[position], position)
+            unique_positions = list(first_position.values())
+            new_embeddings = self._encode([processed_texts[position] for position in unique_positions])
+            cache.store([keys[position] for position in unique_positions], new_embeddings)
+            row_of_key = {keys[position]: row for row, position in enumerate(unique_positions)}
+            embeddings[missing] = new_embeddings[[row_of_key[keys[position]] for position in missing]]
+            encoded = len(unique_positions)
+
+        evicted = cache.retain(keys) if evict_orphans and shared_cache is None else 0
+        if shared_cache is None and (encoded or evicted):
+            try:
+                cache.save()
+            except Exception as e:
+                logger.warning(f"Could not save embedding cache: {e}")
+
+        self.last_embed_stats = {
+            'texts': len(processed_texts),
+            'reused': len(processed_texts) - len(missing),
+            'encoded': encoded,
+            'evicted': evicted,
+            'cache_size': len(cache),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+        logger.info(f"Embedded {len(processed_texts)} texts: {self.last_embed_stats['reused']} from cache, "
+                    f"{encoded} encoded, {evicted} evicted in {self.last_embed_stats['elapsed_ms']} ms")
+        return embeddings
     
     def get_model_info(self) -> dict:
         """Get comprehensive information about the loaded model"""
@@ -87,7 +352,11 @@ class ModelManager:
                 'model_name': self.model_name,
                 'embedding_dimension': self.embed_dim,
                 'model_loaded': self.model is not None,
-                'model_type': 'SentenceTransformer',
+                'model_source': self.model_source,
+                'load_timings': self.load_timings,
+                'model_type': 'ONNXRuntime' if self.embedding_backend in ONNX_BACKENDS else 'SentenceTransformer',
+                'embedding_backend': self.embedding_backend,
+                'backend_drift': self.backend_info.get('drift'),
                 'supports_multilingual': True,
                 'optimized_for': 'semantic_search'
             }
@@ -0,0 +1,133 @@
+import re
+import logging
+from typing import Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+class FlagPattern:
+    """Combined precompiled regex that reports every flag whose phrases occur in a text in one scan
+
+    Phrases are lowercase words separated by spaces; they match as whole words with any
+    whitespace between them, like the original \\bword\\s+word\\b patterns.
+    """
+
+    def __init__(self, flags: Dict[str, List[str]]):
+        flags_by_words = {}
+        for name, phrases in flags.items():
+            for phrase in phrases:
+                flags_by_words.setdefault(tuple(phrase.split()), set()).add(name)
+
+        # Shorter phrases made of a phrase's leading words match at the same position too
+        self._phrase_flags = {
+            ' '.join(words): frozenset().union(*(
+                names for other, names in flags_by_words.items() if words[:len(other)] == other
+            ))
+            for words in flags_by_words
+        }
+
+        # Longest phrases first, so the phrase captured at a position is the longest one there
+        alternatives = sorted(flags_by_words, key=lambda words: (-len(' '.join(words)), words))
+        self.regex = re.compile(
+            r'(?=\b(?P<phrase>' + '|'.join(r'\s+'.join(map(re.escape, words)) for words in alternatives) + r')\b)'
+        )
+
+    def flags(self, text: str) -> Set[str]:
+        """Names of all flags present in the text"""
+        found = set()
+        for phrase in {match.group('phrase') for match in self.regex.finditer(text)}:
+            found |= self._phrase_flags[' '.join(phrase.split())]
+        return found
+
+SEAFOOD_TERMS = [
+    'ikan', 'fish', 'udang', 'shrimp', 'prawn', 'cumi', 'squid', 'sotong',
+    'kepiting', 'crab', 'rajungan', 'kerang', 'mussel', 'clam',
+    'lobster', 'seafood', 'makanan laut',
+    'salmon', 'tuna', 'kakap', 'gurame', 'lele', 'nila', 'bandeng', 'tenggiri'
+]
+
+LAND_ANIMAL_TERMS = [
+    'ayam', 'chicken', 'sapi', 'beef', 'kambing', 'goat', 'bebek', 'duck', 'telur', 'egg', 'daging'
+]
+
+VEGETARIAN_TERMS = [
+    'vegetarian', 'vegan', 'nabati', 'tahu', 'tofu', 'tempe', 'tempeh', 'jamur', 'mushroom'
+]
+
+# Specific proteins, in the order the detector reports them
+SEAFOOD_PROTEIN_TERMS = {
+    'ikan': ['ikan'],
+    'udang': ['udang'],
+    'cumi': ['cumi'],
+    'kepiting': ['kepiting'],
+    'kerang': ['kerang'],
+    'lobster': ['lobster']
+}
+
+# Whole words only: the original "beef\b", "daging\b" and "egg\b" also matched inside words such as
+# "berdaging" or "pngegg"
+LAND_PROTEIN_TERMS = {
+    'sapi': ['sapi', 'beef', 'daging'],
+    'ayam': ['ayam', 'chicken'],
+    'kambing': ['kambing', 'goat'],
+    'bebek': ['bebek', 'duck'],
+    'telur': ['telur', 'egg']
+}
+
+FLAVOR_TERMS = {
+    'pedas': ['pedas', 'spicy', 'hot', 'cabai', 'chili', 'sambal', 'cabe', 'rica', 'balado', 'level'],
+    'manis': ['manis', 'sweet', 'gula', 'kecap manis', 'gula jawa', 'palm sugar', 'manis gurih'],
+    'gurih': ['gurih', 'savory', 'asin', 'salty', 'umami', 'sedap'],
+    'asam': ['asin', 'sour', 'tamarind', 'belimbing', 'jeruk', 'lime', 'asem', 'kecut'],
+    'berkuah': ['kuah', 'berkuah', 'soup', 'broth', 'soto', 'sup', 'kaldu', 'sauce'],
+    'kering': ['kering', 'dry', 'tanpa kuah', 'tidak berkuah'],
+    'segar': ['segar', 'fresh', 'sejuk', 'dingin'],
+    'sehat': ['sehat', 'healthy', 'diet', 'low fat']
+}
+
+REGION_TERMS = {
+    'padang': ['padang', 'minang', 'sumatera barat', 'rendang', 'gulai', 'minangkabau', 'masakan padang'],
+    'manado': ['manado', 'sulawesi utara', 'woku', 'rica', 'minahasa', 'masakan manado'],
+    'jawa': ['jawa', 'javanese', 'jogja', 'solo', 'semarang', 'gudeg', 'rawon', 'yogyakarta', 'masakan jawa'],
+    'sunda': ['sunda', 'bandung', 'priangan', 'karedok', 'pepes', 'sundanese', 'masakan sunda'],
+    'bali': ['bali', 'balinese', 'betutu', 'bumbu bali', 'masakan bali'],
+    'aceh': ['aceh', 'acehnese', 'mie aceh', 'kuah pliek', 'masakan aceh'],
+    'betawi': ['betawi', 'jakarta', 'kerak telor', 'ketoprak'],
+    'palembang': ['palembang', 'sumatera selatan', 'pempek', 'tekwan', 'sumsel'],
+    'lombok': ['lombok', 'sasak', 'plecing', 'ayam taliwang'],
+    'medan': ['medan', 'batak', 'bika ambon', 'soto medan']
+}
+
+SEAFOOD_FILTER_TERMS = SEAFOOD_TERMS + ['mujair', 'patin', 'bawal', 'dori']
+
+SEAFOOD_EXCLUSION_TERMS = [
+    'ayam', 'chicken', 'sapi', 'beef', 'kambing', 'goat', 'bebek', 'duck', 'telur', 'egg', 'tahu', 'tempe'
+]
+
+VEGETARIAN_FILTER_TERMS = [
+    'tahu', 'tofu', 'tempe', 'tempeh', 'vegetarian', 'vegan', 'nabati', 'sayur', 'jamur', 'mushroom'
+]
+
+VEGETARIAN_EXCLUSION_TERMS = [
+    'ayam', 'chicken', 'ikan', 'fish', 'sapi', 'beef', 'udang', 'shrimp', 'cumi', 'squid', 'daging', 'meat'
+]
+
+# Shared registry of precompiled detectors, each settling all of its flags in one scan
+PATTERNS = {
+    'protein': FlagPattern({
+        'seafood': SEAFOOD_TERMS,
+        'land_animal': LAND_ANIMAL_TERMS,
+        'vegetarian': VEGETARIAN_TERMS,
+        **SEAFOOD_PROTEIN_TERMS,
+        **LAND_PROTEIN_TERMS
+    }),
+    'flavor': FlagPattern(FLAVOR_TERMS),
+    'region': FlagPattern(REGION_TERMS),
+    'seafood_filter': FlagPattern({
+        'seafood': SEAFOOD_FILTER_TERMS,
+        'excluded': SEAFOOD_EXCLUSION_TERMS
+    }),
+    'vegetarian_filter': FlagPattern({
+        'vegetarian': VEGETARIAN_FILTER_TERMS,
+        'excluded': VEGETARIAN_EXCLUSION_TERMS
+    })
+}
@@ -0,0 +1,126 @@
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from collections import Counter
+from scipy import sparse
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ('title', 'ingredients', 'description')
+GRAM_SIZE = 3
+
+class FieldTokens:
+    """Distinct whitespace tokens of one text field, a trigram table over them and token -> menu counts"""
+
+    def __init__(self, tokens: List[str], grams: Dict[str, np.ndarray], postings: sparse.csr_matrix):
+        self.tokens = tokens
+        self.grams = grams
+        self.postings = postings
+
+    @classmethod
+    def build(cls, texts: List[str]) -> 'FieldTokens':
+        token_ids = {}
+        rows, columns, counts = [], [], []
+        for position, text in enumerate(texts):
+            for token, count in Counter(text.split()).items():
+                rows.append(token_ids.setdefault(token, len(token_ids)))
+                columns.append(position)
+                counts.append(count)
+
+        tokens = list(token_ids)
+        grams_by_token = {}
+        for token_id, token in enumerate(tokens):
+            for gram in {token[i:i + GRAM_SIZE] for i in range(len(token) - GRAM_SIZE + 1)}:
+                grams_by_token.setdefault(gram, []).append(token_id)
+        grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams_by_token.items()}
+
+        postings = sparse.csr_matrix(
+            (np.array(counts, dtype=np.int32), (np.array(rows, dtype=np.int32), np.array(columns, dtype=np.int32))),
+            shape=(len(tokens), len(texts))
+        )
+        return cls(tokens, grams, postings)
+
+    def tokens_containing(self, word: str) -> np.ndarray:
+        """Ids of the tokens that contain word as a substring"""
+        if len(word) < GRAM_SIZE:
+            return np.array([i for i, token in enumerate(self.tokens) if word in token], dtype=np.int32)
+
+        candidates = None
+        for gram in {word[i:i + GRAM_SIZE] for i in range(len(word) - GRAM_SIZE + 1)}:
+            ids = self.grams.get(gram)
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([i for i in candidates if word in self.tokens[i]], dtype=np.int32)
+
+    def token_counts(self, word: str) -> np.ndarray:
+        """Per menu, the number of whitespace tokens that contain word"""
+        ids = self.tokens_containing(word)
+        if ids.size == 0:
+            return np.zeros(self.postings.shape[1], dtype=np.int64)
+        return np.asarray(self.postings[ids].sum(axis=0), dtype=np.int64).ravel()
+
+class TextIndex:
+    """Token index over the lowercased title, ingredients and description of every menu
+
+    A query word with no whitespace occurs in a field exactly when it occurs in one of the field's
+    whitespace tokens, so substring tests and token scans reduce to vocabulary lookups.
+    """
+
+    def __init__(self, fields: Dict[str, FieldTokens], num_menus: int):
+        self.fields = fields
+        self.num_menus = num_menus
+
+    @classmethod
+    def build(cls, menus_df: pd.DataFrame) -> 'TextIndex':
+        """Index the text fields, formatted the same way as str(menu.get(field, '')).lower()"""
+        fields = {}
+        for field in TEXT_FIELDS:
+            if field in menus_df.columns:
+                texts = [str(value).lower() for value in menus_df[field]]
+            else:
+                texts = [''] * len(menus_df)
+            fields[field] = FieldTokens.build(texts)
+        logger.info(f"Built text index: {', '.join(f'{f}={len(fields[f].tokens)}' for f in TEXT_FIELDS)} tokens "
+                    f"over {len(menus_df)} menus")
+        return cls(fields, len(menus_df))
+
+    @classmethod
+    def load(cls, path: str) -> 'TextIndex':
+        """Load a text index written by save()"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return cls(data['fields'], data['num_menus'])
+
+    def save(self, path: str) -> None:
+        """Persist the token index next to the catalog"""
+        with open(path, 'wb') as f:
+            pickle.dump({'fields': self.fields, 'num_menus': self.num_menus}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def relevance(self, query_clean: str, positions: np.ndarray) -> np.ndarray:
+        """MenuSearcher._calculate_text_relevance for the menus at the given row positions"""
+        relevance = np.zeros(len(positions), dtype=np.float64)
+        for word in self._query_words(query_clean):
+            title = self.fields['title'].token_counts(word)[positions]
+            ingredients = self.fields['ingredients'].token_counts(word)[positions]
+            description = self.fields['description'].token_counts(word)[positions]
+            relevance += np.where(title > 0, 50, np.where(ingredients > 0, 25, np.where(description > 0, 10, 0)))
+
+            if len(word) > 4:
+                # Every token containing the word is longer than 4 characters
+                relevance += 30 * 0.5 * title + 15 * 0.5 * ingredients
+        return relevance
+
+    def hit_mask(self, query_clean: str, positions: np.ndarray) -> np.ndarray:
+        """Menus whose title, ingredients or description contain any query word"""
+        hits = np.zeros(self.num_menus, dtype=bool)
+        for word in self._query_words(query_clean):
+            for field in TEXT_FIELDS:
+                hits |= self.fields[field].token_counts(word) > 0
+        return hits[positions]
+
+    @staticmethod
+    def _query_words(query_clean: str) -> List[str]:
+        return [word for word in query_clean.lower().split() if len(word) > 2]
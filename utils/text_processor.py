@@ -3,12 +3,28 @@ import pandas as pd
 import logging
 from typing import Dict, List
 from difflib import SequenceMatcher
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from config.food_keywords import FOOD_KEYWORDS, FOOD_SYNONYMS
+from config.model_config import MODEL_CONFIG
+from utils.keyword_matcher import KeywordMatcher
+from utils.pattern_registry import PATTERNS, SEAFOOD_PROTEIN_TERMS, LAND_PROTEIN_TERMS, FLAVOR_TERMS, REGION_TERMS
+from utils.lru_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Built once from FOOD_KEYWORDS; matches every keyword in a single pass over the text
+KEYWORD_MATCHER = KeywordMatcher(FOOD_KEYWORDS)
+
+# Boolean dietary columns computed once per menu at ingest
+PROTEIN_FLAG_COLUMNS = {f'protein_{protein}': protein for protein in (*SEAFOOD_PROTEIN_TERMS, *LAND_PROTEIN_TERMS)}
+DIETARY_COLUMNS = ['is_vegetarian', 'is_seafood'] + list(PROTEIN_FLAG_COLUMNS)
+
+# Query-side results keyed on normalized text; chatbot queries repeat a lot, so these hit often
+QUERY_CACHES = {
+    'preprocess': LRUCache(MODEL_CONFIG['cache_size']),
+    'synonyms': LRUCache(MODEL_CONFIG['cache_size']),
+    'features': LRUCache(MODEL_CONFIG['cache_size'])
+}
+
 class TextProcessor:
     """Enhanced text processing with fixed flavor and regional detection"""
     
@@ -69,26 +85,7 @@ class TextProcessor:
             if not text_lower:
                 return {}
                 
-            features = {}
-            
-            for category, subcategories in FOOD_KEYWORDS.items():
-                found_features = []
-                
-                for subcategory, keywords in subcategories.items():
-                    try:
-                        sorted_keywords = sorted(keywords, key=len, reverse=True)
-                        
-                        for keyword in sorted_keywords:
-                            if TextProcessor._is_keyword_match(keyword, text_lower):
-                                found_features.append(subcategory)
-                                break
-                                
-                    except Exception as e:
-                        logger.warning(f"Error processing subcategory {subcategory}: {e}")
-                        continue
-                
-                if found_features:
-                    features[category] = list(set(found_features))
+            features = KEYWORD_MATCHER.match(text_lower)
             
             features = TextProcessor._apply_enhanced_detection_logic(text_lower, features)
             
@@ -99,25 +96,75 @@ class TextProcessor:
             return {}
     
     @staticmethod
-    def _is_keyword_match(keyword: str, text: str) -> bool:
-        """Enhanced keyword matching with context awareness"""
+    def build_menu_text(menu) -> str:
+        """Combined lowercase title, ingredients and description of a menu row"""
+        return f"{menu.get('title', '')} {menu.get('ingredients', '')} {menu.get('description', '')}".lower()
+    
+    @staticmethod
+    def get_menu_features(menu) -> Dict[str, List[str]]:
+        """Features stored for a menu at ingest time, extracted on the fly for legacy catalogs"""
         try:
-            keyword_lower = keyword.lower()
-            
-            if ' ' in keyword_lower:
-                if keyword_lower in text:
-                    return True
-                keyword_words = keyword_lower.split()
-                return all(word in text for word in keyword_words if len(word) > 2)
-            
-            if len(keyword_lower) > 3:
-                return keyword_lower in text
-            else:
-                return bool(re.search(rf'\b{re.escape(keyword_lower)}\b', text))
-                
+            features = menu.get('features')
+            if isinstance(features, dict):
+                return features
+            return TextProcessor.extract_features(TextProcessor.build_menu_text(menu))
         except Exception as e:
-            logger.warning(f"Error in keyword matching: {e}")
-            return False
+            logger.warning(f"Error getting menu features: {e}")
+            return {}
+    
+    @staticmethod
+    def extract_dietary_flags(menu_text: str) -> Dict[str, bool]:
+        """Strict vegetarian/seafood classes and per-protein flags of a lowercase menu text"""
+        seafood_flags = PATTERNS['seafood_filter'].flags(menu_text)
+        vegetarian_flags = PATTERNS['vegetarian_filter'].flags(menu_text)
+        protein_flags = PATTERNS['protein'].flags(menu_text)
+        
+        flags = {
+            'is_vegetarian': 'vegetarian' in vegetarian_flags and 'excluded' not in vegetarian_flags,
+            'is_seafood': 'seafood' in seafood_flags and 'excluded' not in seafood_flags
+        }
+        for column, protein in PROTEIN_FLAG_COLUMNS.items():
+            flags[column] = protein in protein_flags
+        return flags
+    
+    @staticmethod
+    def add_dietary_columns(menus_df: pd.DataFrame) -> pd.DataFrame:
+        """Copy of menus_df with the DIETARY_COLUMNS boolean columns filled in"""
+        rows = [TextProcessor.extract_dietary_flags(TextProcessor.build_menu_text(menu))
+                for _, menu in menus_df.iterrows()]
+        flags = pd.DataFrame(rows, columns=DIETARY_COLUMNS, index=menus_df.index, dtype=bool)
+        return menus_df.assign(**{column: flags[column] for column in DIETARY_COLUMNS})
+    
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """Lowercased text with collapsed whitespace, used as the query cache key"""
+        if not isinstance(text, str):
+            text = "" if text is None or pd.isna(text) else str(text)
+        return ' '.join(text.lower().split())
+    
+    @staticmethod
+    def preprocess_query(query: str) -> str:
+        """Cached preprocess_text for user queries"""
+        key = TextProcessor.normalize_query(query)
+        return QUERY_CACHES['preprocess'].get_or_compute(key, lambda: TextProcessor.preprocess_text(key))
+    
+    @staticmethod
+    def expand_query(query: str) -> str:
+        """Cached expand_with_synonyms for user queries"""
+        key = TextProcessor.normalize_query(query)
+        return QUERY_CACHES['synonyms'].get_or_compute(key, lambda: TextProcessor.expand_with_synonyms(key))
+    
+    @staticmethod
+    def extract_query_features(query: str) -> Dict[str, List[str]]:
+        """Cached extract_features for user queries; returns a copy callers may modify"""
+        key = TextProcessor.preprocess_query(query)
+        features = QUERY_CACHES['features'].get_or_compute(key, lambda: TextProcessor.extract_features(key))
+        return {category: list(values) for category, values in features.items()}
+    
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Dict]:
+        """Hit/miss counters of the query caches"""
+        return {name: cache.stats() for name, cache in QUERY_CACHES.items()}
     
     @staticmethod
     def _apply_enhanced_detection_logic(text_lower: str, features: Dict) -> Dict:
@@ -142,35 +189,10 @@ class TextProcessor:
             if 'protein' not in features:
                 features['protein'] = []
             
-            seafood_patterns = [
-                r'\bikan\s+\w+', r'\bikan\b', r'\bfish\b',
-                r'\budang\s+\w+', r'\budang\b', r'\bshrimp\b', r'\bprawn\b',
-                r'\bcumi\s+\w+', r'\bcumi\b', r'\bsquid\b', r'\bsotong\b',
-                r'\bkepiting\b', r'\bcrab\b', r'\brajungan\b',
-                r'\bkerang\b', r'\bmussel\b', r'\bclam\b',
-                r'\blobster\b', r'\bseafood\b', r'\bmakanan\s+laut\b',
-                r'\bsalmon\b', r'\btuna\b', r'\bkakap\b', r'\bgurame\b',
-                r'\blele\b', r'\bnila\b', r'\bbandeng\b', r'\btenggiri\b'
-            ]
-            
-            land_animal_patterns = [
-                r'\bayam\b', r'\bchicken\b', r'\bsapi\b', r'\bbeef\b',
-                r'\bkambing\b', r'\bgoat\b', r'\bbebek\b', r'\bduck\b',
-                r'\btelur\b', r'\begg\b', r'\bdaging\b'
-            ]
-            
-            vegetarian_patterns = [
-                r'\bvegetarian\b', r'\bvegan\b', r'\bnabati\b',
-                r'\btahu\b', r'\btofu\b', r'\btempe\b', r'\btempeh\b',
-                r'\bjamur\b', r'\bmushroom\b'
-            ]
-            
-            has_seafood = any(re.search(pattern, text_lower, re.IGNORECASE) 
-                            for pattern in seafood_patterns)
-            has_land_animal = any(re.search(pattern, text_lower, re.IGNORECASE) 
-                                for pattern in land_animal_patterns)
-            has_vegetarian = any(re.search(pattern, text_lower, re.IGNORECASE) 
-                               for pattern in vegetarian_patterns)
+            flags = PATTERNS['protein'].flags(text_lower)
+            has_seafood = 'seafood' in flags
+            has_land_animal = 'land_animal' in flags
+            has_vegetarian = 'vegetarian' in flags
             
             detected_proteins = []
             
@@ -178,36 +200,16 @@ class TextProcessor:
                 detected_proteins.append('vegetarian')
                 
             elif has_seafood:
-                if re.search(r'\bikan\b', text_lower):
-                    detected_proteins.append('ikan')
-                if re.search(r'\budang\b', text_lower):
-                    detected_proteins.append('udang')
-                if re.search(r'\bcumi\b', text_lower):
-                    detected_proteins.append('cumi')
-                if re.search(r'\bkepiting\b', text_lower):
-                    detected_proteins.append('kepiting')
-                if re.search(r'\bkerang\b', text_lower):
-                    detected_proteins.append('kerang')
-                if re.search(r'\blobster\b', text_lower):
-                    detected_proteins.append('lobster')
+                detected_proteins = [protein for protein in SEAFOOD_PROTEIN_TERMS if protein in flags]
                     
-                if not detected_proteins and has_seafood:
+                if not detected_proteins:
                     detected_proteins.append('seafood')
                     
             elif has_land_animal:
-                if re.search(r'\bsapi\b|beef\b|daging\b', text_lower):
-                    detected_proteins.append('sapi')
-                if re.search(r'\bayam\b|chicken\b', text_lower):
-                    detected_proteins.append('ayam')
-                if re.search(r'\bkambing\b|goat\b', text_lower):
-                    detected_proteins.append('kambing')
-                if re.search(r'\bbebek\b|duck\b', text_lower):
-                    detected_proteins.append('bebek')
-                if re.search(r'\btelur\b|egg\b', text_lower):
-                    detected_proteins.append('telur')
+                detected_proteins = [protein for protein in LAND_PROTEIN_TERMS if protein in flags]
             
             if detected_proteins:
-                all_proteins = list(set(features['protein'] + detected_proteins))
+                all_proteins = list(dict.fromkeys(features['protein'] + detected_proteins))
                 features['protein'] = all_proteins
             
             return features
@@ -223,29 +225,11 @@ class TextProcessor:
             if 'flavor' not in features:
                 features['flavor'] = []
             
-            flavor_patterns = {
-                'pedas': [r'\bpedas\b', r'\bspicy\b', r'\bhot\b', r'\bcabai\b', r'\bchili\b', 
-                         r'\bsambal\b', r'\bcabe\b', r'\brica\b', r'\bbalado\b', r'\blevel\b'],
-                'manis': [r'\bmanis\b', r'\bsweet\b', r'\bgula\b', r'\bkecap\s+manis\b', 
-                         r'\bgula\s+jawa\b', r'\bpalm\s+sugar\b', r'\bmanis\s+gurih\b'],
-                'gurih': [r'\bgurih\b', r'\bsavory\b', r'\basin\b', r'\bsalty\b', r'\bumami\b', r'\bsedap\b'],
-                'asam': [r'\basin\b', r'\bsour\b', r'\btamarind\b', r'\bbelimbing\b', r'\bjeruk\b', 
-                        r'\blime\b', r'\basem\b', r'\bkecut\b'],
-                'berkuah': [r'\bkuah\b', r'\bberkuah\b', r'\bsoup\b', r'\bbroth\b', r'\bsoto\b', 
-                           r'\bsup\b', r'\bkaldu\b', r'\bsauce\b'],
-                'kering': [r'\bkering\b', r'\bdry\b', r'\btanpa\s+kuah\b', r'\btidak\s+berkuah\b'],
-                'segar': [r'\bsegar\b', r'\bfresh\b', r'\bsejuk\b', r'\bdingin\b'],
-                'sehat': [r'\bsehat\b', r'\bhealthy\b', r'\bdiet\b', r'\blow\s+fat\b']
-            }
-            
-            detected_flavors = []
-            
-            for flavor_name, patterns in flavor_patterns.items():
-                if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in patterns):
-                    detected_flavors.append(flavor_name)
+            flags = PATTERNS['flavor'].flags(text_lower)
+            detected_flavors = [flavor_name for flavor_name in FLAVOR_TERMS if flavor_name in flags]
             
             if detected_flavors:
-                all_flavors = list(set(features['flavor'] + detected_flavors))
+                all_flavors = list(dict.fromkeys(features['flavor'] + detected_flavors))
                 features['flavor'] = all_flavors
             
             return features
@@ -261,34 +245,11 @@ class TextProcessor:
             if 'region' not in features:
                 features['region'] = []
             
-            regional_patterns = {
-                'padang': [r'\bpadang\b', r'\bminang\b', r'\bsumatera\s+barat\b', r'\brendang\b', 
-                          r'\bgulai\b', r'\bminangkabau\b', r'\bmasakan\s+padang\b'],
-                'manado': [r'\bmanado\b', r'\bsulawesi\s+utara\b', r'\bwoku\b', r'\brica\b', 
-                          r'\bminahasa\b', r'\bmasakan\s+manado\b'],
-                'jawa': [r'\bjawa\b', r'\bjavanese\b', r'\bjogja\b', r'\bsolo\b', r'\bsemarang\b', 
-                        r'\bgudeg\b', r'\brawon\b', r'\byogyakarta\b', r'\bmasakan\s+jawa\b'],
-                'sunda': [r'\bsunda\b', r'\bbandung\b', r'\bpriangan\b', r'\bkaredok\b', 
-                         r'\bpepes\b', r'\bsundanese\b', r'\bmasakan\s+sunda\b'],
-                'bali': [r'\bbali\b', r'\bbalinese\b', r'\bbetutu\b', r'\bbumbu\s+bali\b', 
-                        r'\bmasakan\s+bali\b'],
-                'aceh': [r'\baceh\b', r'\bacehnese\b', r'\bmie\s+aceh\b', r'\bkuah\s+pliek\b', 
-                        r'\bmasakan\s+aceh\b'],
-                'betawi': [r'\bbetawi\b', r'\bjakarta\b', r'\bkerak\s+telor\b', r'\bketoprak\b'],
-                'palembang': [r'\bpalembang\b', r'\bsumatera\s+selatan\b', r'\bpempek\b', 
-                             r'\btekwan\b', r'\bsumsel\b'],
-                'lombok': [r'\blombok\b', r'\bsasak\b', r'\bplecing\b', r'\bayam\s+taliwang\b'],
-                'medan': [r'\bmedan\b', r'\bbatak\b', r'\bbika\s+ambon\b', r'\bsoto\s+medan\b'],
-            }
-            
-            detected_regions = []
-            
-            for region_name, patterns in regional_patterns.items():
-                if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in patterns):
-                    detected_regions.append(region_name)
+            flags = PATTERNS['region'].flags(text_lower)
+            detected_regions = [region_name for region_name in REGION_TERMS if region_name in flags]
             
             if detected_regions:
-                all_regions = list(set(features['region'] + detected_regions))
+                all_regions = list(dict.fromkeys(features['region'] + detected_regions))
                 features['region'] = all_regions
             
             return features
@@ -343,33 +304,6 @@ class TextProcessor:
             logger.warning(f"Error calculating similarity: {e}")
             return 0.0
     
-    @staticmethod
-    def calculate_tfidf_score(query: str, menu_text: str, all_menu_texts: List[str]) -> float:
-        """Calculate TF-IDF based relevance score with error handling"""
-        try:
-            if not query or not menu_text or not all_menu_texts:
-                return 0.0
-                
-            documents = [query] + all_menu_texts + [menu_text]
-            
-            vectorizer = TfidfVectorizer(
-                lowercase=True,
-                max_features=1000,
-                ngram_range=(1, 2),
-                stop_words=None
-            )
-            
-            tfidf_matrix = vectorizer.fit_transform(documents)
-            query_vector = tfidf_matrix[0]
-            menu_vector = tfidf_matrix[-1]
-            
-            similarity = cosine_similarity(query_vector, menu_vector)[0][0]
-            return float(similarity)
-            
-        except Exception as e:
-            logger.warning(f"TF-IDF calculation error: {e}")
-            return 0.0
-    
     @staticmethod
     def extract_numeric_price(price_text) -> int:
         """Extract numeric value from price text with error handling"""
@@ -0,0 +1,84 @@
+import logging
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional
+from config.model_config import TFIDF_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class TfidfIndex:
+    """TF-IDF model fitted once over the menu texts, scoring a query against many menus in one sparse product"""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, matrix: sparse.csr_matrix,
+                 ngram_range: tuple = (1, 2)):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self.ngram_range = tuple(ngram_range)
+        self._analyzer = None
+
+    @property
+    def num_menus(self) -> int:
+        return self.matrix.shape[0]
+
+    @classmethod
+    def fit(cls, texts: List[str]) -> 'TfidfIndex':
+        """Fit the vocabulary and idf weights and vectorize every menu text"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        ngram_range = tuple(TFIDF_CONFIG.get('ngram_range', (1, 2)))
+        vectorizer = TfidfVectorizer(
+            lowercase=True,
+            ngram_range=ngram_range,
+            max_features=TFIDF_CONFIG.get('max_features'),
+            min_df=TFIDF_CONFIG.get('min_df', 1),
+            dtype=np.float32
+        )
+        matrix = vectorizer.fit_transform(texts).tocsr()
+        vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+        logger.info(f"Fitted TF-IDF index: {len(vocabulary)} terms over {matrix.shape[0]} menus")
+        return cls(vocabulary, vectorizer.idf_.astype(np.float32), matrix, ngram_range)
+
+    @classmethod
+    def load(cls, path: str) -> 'TfidfIndex':
+        """Load an index written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            matrix = sparse.csr_matrix((data['data'], data['indices'], data['indptr']), shape=tuple(data['shape']))
+            terms = data['terms'].tolist()
+            return cls({term: column for column, term in enumerate(terms)}, data['idf'], matrix,
+                       tuple(data['ngram_range'].tolist()))
+
+    def save(self, path: str) -> None:
+        """Persist vocabulary, idf weights and the sparse menu matrix as one .npz file"""
+        terms = np.empty(len(self.vocabulary), dtype=object)
+        for term, column in self.vocabulary.items():
+            terms[column] = term
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                shape=np.array(self.matrix.shape), idf=self.idf,
+                terms=terms.astype(str), ngram_range=np.array(self.ngram_range)
+            )
+
+    def transform(self, text: str) -> np.ndarray:
+        """Dense L2-normalized TF-IDF vector of a query over the fitted vocabulary"""
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer(lowercase=True, ngram_range=self.ngram_range).build_analyzer()
+        
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term in self._analyzer(text or ''):
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] += 1
+
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def scores(self, text: str, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity between the query and every menu, or only the given row positions"""
+        matrix = self.matrix if positions is None else self.matrix[positions]
+        return np.asarray(matrix @ self.transform(text), dtype=np.float64)
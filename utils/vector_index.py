@@ -0,0 +1,251 @@
+import logging
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+from config.model_config import INDEX_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Index structures and vector encodings for the semantic index; all but flat/flat trade exactness for speed or memory
+INDEX_TYPES = ('flat', 'ivf_flat', 'hnsw', 'ivf_pq')
+VECTOR_ENCODINGS = ('flat', 'fp16', 'sq8')
+
+# Index types whose vectors cannot be removed in place: HNSW graphs and the refined IVF-PQ index
+NO_REMOVAL_TYPES = ('hnsw', 'ivf_pq')
+
+# faiss index_factory storage suffix per encoding
+ENCODING_SPECS = {'flat': 'Flat', 'fp16': 'SQfp16', 'sq8': 'SQ8'}
+
+# Search-time parameter tuned per index type, with its config keys for the start value and upper limit
+SEARCH_PARAMS = {
+    'ivf_flat': ('nprobe', 'nprobe', 'max_nprobe'),
+    'ivf_pq': ('nprobe', 'nprobe', 'max_nprobe'),
+    'hnsw': ('efSearch', 'ef_search', 'max_ef_search')
+}
+
+class VectorIndex:
+    """Builds, tunes, checks and loads the FAISS index of menu embeddings, keyed on menu id"""
+
+    @staticmethod
+    def requested() -> Dict[str, str]:
+        """Index type and encoding asked for by INDEX_CONFIG ('auto' is resolved per catalog size)"""
+        return {
+            'index_type': INDEX_CONFIG.get('index_type', 'auto'),
+            'encoding': INDEX_CONFIG.get('vector_encoding', 'flat')
+        }
+
+    @staticmethod
+    def resolve_type(num_vectors: int) -> str:
+        """Concrete index type for a catalog size"""
+        index_type = INDEX_CONFIG.get('index_type', 'auto')
+        if index_type != 'auto':
+            if index_type not in INDEX_TYPES:
+                logger.warning(f"Unknown index type '{index_type}', using flat")
+                return 'flat'
+            return index_type
+        if num_vectors >= INDEX_CONFIG.get('pq_min_size', 500000):
+            return 'ivf_pq'
+        if num_vectors >= INDEX_CONFIG.get('ivf_min_size', 20000):
+            return 'ivf_flat'
+        return 'flat'
+
+    @staticmethod
+    def factory_spec(index_type: str, encoding: str, num_vectors: int, dim: int) -> str:
+        """faiss index_factory description of the index"""
+        storage = ENCODING_SPECS.get(encoding, 'Flat')
+        if index_type == 'hnsw':
+            return f"HNSW{INDEX_CONFIG.get('hnsw_m', 32)},{storage}"
+
+        if index_type in ('ivf_flat', 'ivf_pq'):
+            # ~4*sqrt(n) lists, with at least 39 training points per list
+            nlist = INDEX_CONFIG.get('nlist') or int(4 * np.sqrt(num_vectors))
+            nlist = max(1, min(nlist, num_vectors // 39))
+            if index_type == 'ivf_flat':
+                return f"IVF{nlist},{storage}"
+            pq_m = INDEX_CONFIG.get('pq_m') or max(1, dim // 16)
+            while dim % pq_m:
+                pq_m -= 1
+            # PQ codes shortlist k_factor * k candidates, re-ranked on fp16 vectors
+            return f"IVF{nlist},PQ{pq_m}x{INDEX_CONFIG.get('pq_bits', 8)},Refine(SQfp16)"
+
+        return storage
+
+    @staticmethod
+    def build(embeddings: np.ndarray, ids: np.ndarray, spec: str):
+        """ID-mapped inner-product index from a factory spec, trained on the embeddings themselves"""
+        import faiss
+        base = faiss.index_factory(embeddings.shape[1], spec, faiss.METRIC_INNER_PRODUCT)
+        if not base.is_trained:
+            max_train = INDEX_CONFIG.get('max_train_points')
+            training = embeddings
+            if max_train and len(embeddings) > max_train:
+                rows = np.random.default_rng(0).choice(len(embeddings), max_train, replace=False)
+                training = embeddings[np.sort(rows)]
+            base.train(training)
+        index = faiss.IndexIDMap2(base)
+        index.add_with_ids(embeddings, ids.astype(np.int64))
+        return index
+
+    @staticmethod
+    def apply_search_params(index, params: Dict) -> None:
+        """Set persisted nprobe / efSearch / k_factor on a (possibly id-mapped, refined) index"""
+        if not params:
+            return
+        import faiss
+        base = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+        # faiss.ParameterSpace does not reach through IndexIDMap2, so unwrap by hand
+        if hasattr(base, 'k_factor'):
+            if 'k_factor' in params:
+                base.k_factor = float(params['k_factor'])
+            base = faiss.downcast_index(base.base_index)
+        if 'nprobe' in params and hasattr(base, 'nprobe'):
+            base.nprobe = int(params['nprobe'])
+        if 'efSearch' in params and hasattr(base, 'hnsw'):
+            base.hnsw.efSearch = int(params['efSearch'])
+
+    @staticmethod
+    def recall_at_k(index, embeddings: np.ndarray, ids: np.ndarray, k: int = None,
+                    num_queries: int = None) -> float:
+        """Mean overlap of the index's top-k with an exact flat search, using catalog vectors as queries"""
+        import faiss
+        k = min(k or INDEX_CONFIG.get('recall_k', 10), len(embeddings))
+        num_queries = min(num_queries or INDEX_CONFIG.get('recall_queries', 200), len(embeddings))
+        if k == 0 or num_queries == 0:
+            return 1.0
+
+        rng = np.random.default_rng(0)
+        queries = embeddings[rng.choice(len(embeddings), num_queries, replace=False)]
+        exact = faiss.IndexFlatIP(embeddings.shape[1])
+        exact.add(embeddings)
+        _, exact_rows = exact.search(queries, k)
+        _, labels = index.search(queries, k)
+
+        expected = ids.astype(np.int64)[exact_rows]
+        hits = sum(len(set(found) & set(truth)) for found, truth in zip(labels.tolist(), expected.tolist()))
+        return hits / float(num_queries * k)
+
+    @staticmethod
+    def build_checked(embeddings: np.ndarray, ids: np.ndarray) -> Tuple[object, Dict]:
+        """Build the configured index, raising nprobe / efSearch until recall@k reaches min_recall
+
+        Falls back to the exact flat index when the limit is reached first.
+        """
+        num_vectors, dim = embeddings.shape
+        index_type = VectorIndex.resolve_type(num_vectors)
+        encoding = INDEX_CONFIG.get('vector_encoding', 'flat')
+        if index_type == 'ivf_pq':
+            encoding = 'pq'
+        spec = VectorIndex.factory_spec(index_type, encoding, num_vectors, dim)
+        min_recall = INDEX_CONFIG.get('min_recall', 0.95)
+
+        index = VectorIndex.build(embeddings, ids, spec)
+        info = VectorIndex._info(index_type, encoding, spec)
+        if spec == 'Flat':
+            info['recall_at_k'] = 1.0
+            return index, info
+
+        params = {}
+        recall = None
+        if index_type in SEARCH_PARAMS:
+            name, start_key, limit_key = SEARCH_PARAMS[index_type]
+            value = INDEX_CONFIG.get(start_key, 8 if name == 'nprobe' else 64)
+            limit = INDEX_CONFIG.get(limit_key, 256 if name == 'nprobe' else 1024)
+            if name == 'nprobe':
+                limit = min(limit, int(spec.split(',')[0][3:]))
+            k_factor = INDEX_CONFIG.get('k_factor', 4)
+            while True:
+                params = {name: min(value, limit)}
+                if index_type == 'ivf_pq':
+                    params['k_factor'] = k_factor
+                VectorIndex.apply_search_params(index, params)
+                recall = VectorIndex.recall_at_k(index, embeddings, ids)
+                if recall >= min_recall or value >= limit:
+                    break
+                value *= 2
+                # widen the refine shortlist along with the probed lists
+                k_factor = min(k_factor * 2, INDEX_CONFIG.get('max_k_factor', 64))
+        else:
+            recall = VectorIndex.recall_at_k(index, embeddings, ids)
+
+        info['search_params'] = params
+        info['recall_at_k'] = round(recall, 4)
+        if recall < min_recall:
+            logger.warning(f"{spec} index recall@{info['recall_k']} is {recall:.3f} at {params or 'default'}, "
+                           f"below {min_recall}; using the exact flat index")
+            info.update({'index_type': 'flat', 'encoding': 'flat', 'factory': 'Flat', 'search_params': {},
+                         'recall_at_k': 1.0, 'rejected_factory': spec, 'rejected_recall': round(recall, 4)})
+            return VectorIndex.build(embeddings, ids, 'Flat'), info
+
+        logger.info(f"Built {spec} index over {num_vectors} vectors: recall@{info['recall_k']} {recall:.3f} "
+                    f"with {params or 'default search parameters'}")
+        return index, info
+
+    @staticmethod
+    def streaming(num_vectors: int, dim: int) -> Tuple[object, Dict]:
+        """Empty exact index that chunks of vectors can be appended to as they are embedded
+
+        Returns (None, None) when the index configured for num_vectors must first be trained on all of them.
+        """
+        index_type = VectorIndex.resolve_type(num_vectors)
+        encoding = INDEX_CONFIG.get('vector_encoding', 'flat')
+        spec = VectorIndex.factory_spec(index_type, encoding, num_vectors, dim)
+        if spec != 'Flat':
+            return None, None
+        import faiss
+        info = dict(VectorIndex._info(index_type, encoding, spec), recall_at_k=1.0)
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim)), info
+
+    @staticmethod
+    def supports_removal(index_info: Dict) -> bool:
+        """Whether the stored index can drop vectors, as an incremental update with stale ids needs"""
+        return index_info.get('index_type') not in NO_REMOVAL_TYPES
+
+    @staticmethod
+    def apply_delta(index, stale_ids: Iterable[int], embeddings: Optional[np.ndarray] = None,
+                    ids: Optional[np.ndarray] = None) -> bool:
+        """Drop the vectors of stale ids and add the new ones in place; False if the index cannot remove ids"""
+        stale_ids = np.asarray(list(stale_ids), dtype=np.int64)
+        if len(stale_ids):
+            try:
+                index.remove_ids(stale_ids)
+            except RuntimeError as e:
+                logger.info(f"Index cannot remove vectors in place: {str(e).splitlines()[0] if str(e) else e}")
+                return False
+        if embeddings is not None and len(embeddings):
+            index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+        return True
+
+    @staticmethod
+    def reconstruct(index) -> np.ndarray:
+        """Stored vectors of an id-mapped exact index, in insertion order"""
+        import faiss
+        return faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+
+    @staticmethod
+    def _info(index_type: str, encoding: str, spec: str) -> Dict:
+        """Index description persisted in the catalog metadata"""
+        return {
+            'index_type': index_type,
+            'resolved_type': index_type,
+            'encoding': encoding,
+            'factory': spec,
+            'requested': VectorIndex.requested(),
+            'search_params': {},
+            'recall_k': INDEX_CONFIG.get('recall_k', 10)
+        }
+
+    @staticmethod
+    def read(path: str, mmap: bool = None, search_params: Dict = None):
+        """Load an index, memory-mapping its vector codes so worker processes share one page-cache copy"""
+        import faiss
+        mmap = INDEX_CONFIG.get('mmap', True) if mmap is None else mmap
+        flag = getattr(faiss, 'IO_FLAG_MMAP_IFC', None)
+        index = None
+        if mmap and flag is not None:
+            try:
+                index = faiss.read_index(path, flag)
+            except Exception as e:
+                logger.warning(f"Could not memory-map {path}, reading it into memory: {e}")
+        if index is None:
+            index = faiss.read_index(path)
+        VectorIndex.apply_search_params(index, search_params or {})
+        return index
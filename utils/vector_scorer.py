@@ -0,0 +1,179 @@
+import re
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from config.model_config import SEARCH_CONFIG, SCORING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SEAFOOD_VALUES = ['seafood', 'ikan', 'udang', 'cumi']
+BASIC_FLAVORS = ['pedas', 'manis', 'asam', 'gurih']
+TEXTURE_FLAVORS = ['berkuah', 'kering']
+
+class VectorizedScorer:
+    """Array-based equivalent of MenuSearcher._calculate_balanced_score for many menus at once"""
+
+    @staticmethod
+    def score(menus_df: pd.DataFrame, feature_index, query_features: Dict, query_requirements: Dict,
+              query_clean: str, multi_value_satisfaction: float, single_value_satisfaction: float,
+              text_index=None) -> Dict[str, np.ndarray]:
+        """Score every row of menus_df (whose index holds catalog positions) against the query"""
+        positions = menus_df.index.to_numpy()
+        num_rows = len(positions)
+
+        if text_index is not None:
+            relevance = text_index.relevance(query_clean, positions)
+        else:
+            relevance = VectorizedScorer.text_relevance(menus_df, query_clean)
+        feature_score = np.zeros(num_rows, dtype=np.float64)
+        requirements_met = np.zeros(num_rows, dtype=np.int64)
+        categories_satisfied = np.zeros(num_rows, dtype=np.int64)
+        missed_category = np.zeros(num_rows, dtype=bool)
+
+        for feature_type, required_values in query_features.items():
+            if not required_values:
+                continue
+
+            values = list(required_values)
+            matched = feature_index.value_matrix(feature_type, values, positions)
+            matched_count = matched.sum(axis=1)
+            any_match = matched_count > 0
+
+            requirements_met += matched_count
+            categories_satisfied += any_match
+
+            category_score = VectorizedScorer._category_bonus(feature_type, values, matched)
+            feature_score += np.where(any_match, category_score, 0.0)
+
+            if query_requirements['is_multi_value']:
+                feature_score -= np.where(any_match, 0.0, SCORING_CONFIG['missing_value_penalty'] * len(set(values)))
+                missed_category |= ~any_match
+
+        total_score = relevance + feature_score
+
+        total_requirements = query_requirements['total_values']
+        if total_requirements > 0:
+            satisfaction = requirements_met / total_requirements
+        else:
+            satisfaction = np.ones(num_rows, dtype=np.float64)
+
+        if len(query_features) > 0:
+            perfect = categories_satisfied == len(query_features)
+            total_score = total_score + np.where(perfect, SCORING_CONFIG['perfect_category_bonus'], 0)
+
+        min_threshold = SEARCH_CONFIG.get('min_score_threshold', 30)
+        if query_requirements['is_multi_value'] or query_requirements['is_multi_category']:
+            # Multi-value queries never include a menu that leaves a requested category unmatched
+            should_include = (~missed_category & (satisfaction >= multi_value_satisfaction) &
+                              (total_score >= min_threshold))
+        else:
+            should_include = (((satisfaction >= single_value_satisfaction) | (relevance >= 40)) &
+                              (total_score >= (min_threshold * 0.7)))
+
+        return {
+            'total_score': total_score,
+            'relevance_score': relevance,
+            'satisfaction_ratio': satisfaction,
+            'should_include': should_include
+        }
+
+    @staticmethod
+    def _category_bonus(feature_type: str, values: List[str], matched: np.ndarray) -> np.ndarray:
+        """Bonus a menu earns for one feature category, given which required values it matched"""
+        def any_of(names: List[str]) -> np.ndarray:
+            columns = [j for j, value in enumerate(values) if value in names]
+            if not columns:
+                return np.zeros(matched.shape[0], dtype=bool)
+            return matched[:, columns].any(axis=1)
+
+        if feature_type == 'protein':
+            return np.where(any_of(['vegetarian']), SCORING_CONFIG['vegetarian_bonus'],
+                   np.where(any_of(SEAFOOD_VALUES), SCORING_CONFIG['seafood_bonus'],
+                   np.where(any_of(['sapi']), SCORING_CONFIG['protein_bonus'] + 20,
+                            SCORING_CONFIG['protein_bonus']))).astype(np.float64)
+
+        if feature_type == 'flavor':
+            weights = np.array([
+                SCORING_CONFIG['flavor_bonus'] if value in BASIC_FLAVORS
+                else SCORING_CONFIG['flavor_bonus'] * 0.7 if value in TEXTURE_FLAVORS
+                else 0 for value in values
+            ], dtype=np.float64)
+            return matched @ weights
+
+        if feature_type == 'cooking_method':
+            return np.full(matched.shape[0], SCORING_CONFIG['cooking_method_bonus'], dtype=np.float64)
+
+        if feature_type == 'dish_type':
+            return np.full(matched.shape[0], SCORING_CONFIG['dish_type_bonus'], dtype=np.float64)
+
+        if feature_type == 'region':
+            weights = np.array([
+                SCORING_CONFIG['region_bonus'] + 15 if value == 'padang' else SCORING_CONFIG['region_bonus']
+                for value in values
+            ], dtype=np.float64)
+            return matched @ weights
+
+        return np.full(matched.shape[0], 20, dtype=np.float64)
+
+    @staticmethod
+    def max_feature_score(query_features: Dict) -> float:
+        """Upper bound on the feature bonuses (including the perfect-category bonus) any menu can earn"""
+        bound = 0.0
+        for feature_type, required_values in query_features.items():
+            if not required_values:
+                continue
+            values = set(required_values)
+            if feature_type == 'protein':
+                bound += max(SCORING_CONFIG['vegetarian_bonus'], SCORING_CONFIG['seafood_bonus'],
+                             SCORING_CONFIG['protein_bonus'] + 20, SCORING_CONFIG['protein_bonus'])
+            elif feature_type == 'flavor':
+                bound += sum(SCORING_CONFIG['flavor_bonus'] if value in BASIC_FLAVORS
+                             else SCORING_CONFIG['flavor_bonus'] * 0.7 if value in TEXTURE_FLAVORS
+                             else 0 for value in values)
+            elif feature_type == 'cooking_method':
+                bound += SCORING_CONFIG['cooking_method_bonus']
+            elif feature_type == 'dish_type':
+                bound += SCORING_CONFIG['dish_type_bonus']
+            elif feature_type == 'region':
+                bound += sum(SCORING_CONFIG['region_bonus'] + 15 if value == 'padang'
+                             else SCORING_CONFIG['region_bonus'] for value in values)
+            else:
+                bound += 20
+
+        if len(query_features) > 0:
+            bound += SCORING_CONFIG['perfect_category_bonus']
+        return bound
+
+    @staticmethod
+    def text_relevance(menus_df: pd.DataFrame, query_clean: str) -> np.ndarray:
+        """Vectorized MenuSearcher._calculate_text_relevance"""
+        relevance = np.zeros(len(menus_df), dtype=np.float64)
+        query_words = [word for word in query_clean.lower().split() if len(word) > 2]
+        if not query_words or menus_df.empty:
+            return relevance
+
+        title = VectorizedScorer._lower_column(menus_df, 'title')
+        ingredients = VectorizedScorer._lower_column(menus_df, 'ingredients')
+        description = VectorizedScorer._lower_column(menus_df, 'description')
+
+        for word in query_words:
+            in_title = title.str.contains(word, regex=False).to_numpy(dtype=bool)
+            in_ingredients = ingredients.str.contains(word, regex=False).to_numpy(dtype=bool)
+            in_description = description.str.contains(word, regex=False).to_numpy(dtype=bool)
+            relevance += np.where(in_title, 50, np.where(in_ingredients, 25, np.where(in_description, 10, 0)))
+
+            if len(word) > 4:
+                # Every whitespace token containing the word is longer than 4 characters
+                token_pattern = r'\S*' + re.escape(word) + r'\S*'
+                relevance += 30 * 0.5 * title.str.count(token_pattern).to_numpy(dtype=np.float64)
+                relevance += 15 * 0.5 * ingredients.str.count(token_pattern).to_numpy(dtype=np.float64)
+
+        return relevance
+
+    @staticmethod
+    def _lower_column(menus_df: pd.DataFrame, column: str) -> pd.Series:
+        """Lowercased text column, formatted the same way as str(menu.get(column, ''))"""
+        if column not in menus_df.columns:
+            return pd.Series([''] * len(menus_df), index=menus_df.index, dtype=object)
+        return pd.Series([str(value).lower() for value in menus_df[column]], index=menus_df.index, dtype=object)